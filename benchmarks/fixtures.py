@@ -0,0 +1,172 @@
+"""Deterministic, offline spec fixtures sized like the largest real services.
+
+The generators are seeded, so every run (and every machine) sees exactly the
+same documents. Sizes follow the real specs they stand in for:
+
+* ``aws_model``: a Botocore ``service-2`` model shaped like ``ec2``: ~650
+  operations over ~3,000 shapes with nested structures, lists, maps and a few
+  recursive shapes.
+* ``discovery_doc``: a Discovery document shaped like ``compute``: ~90
+  resources with ~800 methods over ~800 schemas.
+* ``azure_swagger``: a Swagger 2.0 document shaped like ``network``: ~1,000
+  operations over ~1,100 definitions, with body parameters and shared
+  parameter refs.
+"""
+
+import random
+
+SCALAR_SHAPES = ("string", "integer", "boolean", "long", "timestamp", "double")
+JSON_TYPES = ("string", "integer", "boolean", "number")
+
+
+def _name(rng, prefix, index):
+    return f"{prefix}{index}{rng.choice(('Id', 'Name', 'Spec', 'Config', 'State', 'Set', ''))}"
+
+
+def _tiers(names, depth):
+    """Splits ``names`` into ``depth`` tiers; shapes only reference the next tier, which bounds tree depth."""
+    size = len(names) // depth
+    return [names[tier * size:(tier + 1) * size] for tier in range(depth - 1)] + [names[(depth - 1) * size:]]
+
+
+def _child_of(rng, tiers, tier):
+    return rng.choice(tiers[tier + 1]) if tier + 1 < len(tiers) else None
+
+
+def aws_model(operations=650, structures=2400, depth=5, seed=2):
+    rng = random.Random(seed)
+    shapes = {name: {"type": name} for name in SCALAR_SHAPES}
+    struct_names = [f"Struct{i}" for i in range(structures)]
+    tiers = _tiers(struct_names, depth)
+
+    for tier, names in enumerate(tiers):
+        for name in names:
+            members = {}
+            for member_index in range(rng.randint(2, 10)):
+                roll = rng.random()
+                child = _child_of(rng, tiers, tier)
+                if roll < 0.7 or child is None:
+                    target = rng.choice(SCALAR_SHAPES)
+                elif roll < 0.85:
+                    target = child
+                elif roll < 0.95:
+                    target = f"{name}List{member_index}"
+                    shapes[target] = {"type": "list", "member": {"shape": child}}
+                elif roll < 0.98:
+                    target = f"{name}Map{member_index}"
+                    shapes[target] = {"type": "map", "key": {"shape": "string"}, "value": {"shape": rng.choice(SCALAR_SHAPES)}}
+                else:
+                    target = name  # recursive shape, cut off by the walker
+                members[_name(rng, "Member", member_index)] = {"shape": target}
+            shapes[name] = {"type": "structure", "members": members}
+
+    model_operations = {}
+    for index in range(operations):
+        op_name = f"Operation{index}"
+        input_name = f"{op_name}Request"
+        members = {
+            _name(rng, "Param", member_index): {
+                "shape": rng.choice(tiers[0]) if rng.random() < 0.4 else rng.choice(SCALAR_SHAPES)
+            }
+            for member_index in range(rng.randint(3, 10))
+        }
+        shapes[input_name] = {"type": "structure", "members": members}
+        model_operations[op_name] = {
+            "name": op_name,
+            "http": {"method": "POST", "requestUri": "/"},
+            "input": {"shape": input_name},
+        }
+
+    return {"metadata": {"apiVersion": "2016-11-15", "serviceId": "EC2"}, "operations": model_operations, "shapes": shapes}
+
+
+def _json_schemas(rng, prefix, count, ref_prefix, depth=5):
+    names = [f"{prefix}{i}" for i in range(count)]
+    tiers = _tiers(names, depth)
+    schemas = {}
+    for tier, tier_names in enumerate(tiers):
+        for name in tier_names:
+            properties = {}
+            for prop_index in range(rng.randint(3, 12)):
+                roll = rng.random()
+                child = _child_of(rng, tiers, tier)
+                if roll < 0.7 or child is None:
+                    prop = {"type": rng.choice(JSON_TYPES)}
+                elif roll < 0.85:
+                    prop = {"$ref": ref_prefix + child}
+                elif roll < 0.98:
+                    prop = {"type": "array", "items": {"$ref": ref_prefix + child}}
+                else:
+                    prop = {"$ref": ref_prefix + name}
+                properties[_name(rng, "field", prop_index)] = prop
+            schema = {"id": name, "type": "object", "properties": properties}
+            required = [prop for prop in properties if rng.random() < 0.15]
+            if required:
+                schema["required"] = required
+            schemas[name] = schema
+    return tiers[0], schemas
+
+
+def discovery_doc(resources=90, schemas=800, seed=3):
+    rng = random.Random(seed)
+    names, schema_map = _json_schemas(rng, "Schema", schemas, "")
+
+    def methods(resource):
+        result = {}
+        for verb in ("get", "list", "insert", "delete", "patch", "update", "setLabels", "setIamPolicy", "aggregatedList")[: rng.randint(5, 9)]:
+            method = {"id": f"compute.{resource}.{verb}", "httpMethod": "POST", "path": f"projects/{{project}}/{resource}/{verb}"}
+            if verb not in ("get", "list", "delete", "aggregatedList"):
+                method["request"] = {"$ref": rng.choice(names)}
+            result[verb] = method
+        return result
+
+    resource_map = {}
+    for index in range(resources):
+        name = f"resource{index}"
+        resource_map[name] = {"methods": methods(name)}
+        if index % 10 == 0:
+            resource_map[name]["resources"] = {f"child{child}": {"methods": methods(f"{name}.child{child}")} for child in range(3)}
+
+    return {
+        "id": "compute:v1",
+        "name": "compute",
+        "version": "v1",
+        "revision": "20240101",
+        "rootUrl": "https://compute.googleapis.com/",
+        "servicePath": "compute/v1/",
+        "schemas": schema_map,
+        "resources": resource_map,
+    }
+
+
+def azure_swagger(paths=330, definitions=1100, seed=4):
+    rng = random.Random(seed)
+    names, schema_map = _json_schemas(rng, "Definition", definitions, "#/definitions/")
+    for schema in schema_map.values():
+        schema.pop("id", None)
+
+    shared_parameters = {
+        "SubscriptionIdParameter": {"name": "subscriptionId", "in": "path", "required": True, "type": "string"},
+        "ApiVersionParameter": {"name": "api-version", "in": "query", "required": True, "type": "string"},
+    }
+    path_map = {}
+    for index in range(paths):
+        base = f"/subscriptions/{{subscriptionId}}/providers/Microsoft.Network/resource{index}/{{name}}"
+        common = [{"$ref": "#/parameters/SubscriptionIdParameter"}, {"$ref": "#/parameters/ApiVersionParameter"}]
+        path_item = {}
+        for verb in ("get", "put", "patch", "delete")[: rng.randint(2, 4)]:
+            operation = {"operationId": f"Resource{index}_{verb.capitalize()}", "parameters": list(common)}
+            if verb in ("put", "patch"):
+                operation["parameters"].append(
+                    {"name": "parameters", "in": "body", "required": True, "schema": {"$ref": "#/definitions/" + rng.choice(names)}}
+                )
+            path_item[verb] = operation
+        path_map[base] = path_item
+
+    return {
+        "swagger": "2.0",
+        "info": {"title": "NetworkManagementClient", "version": "2023-09-01"},
+        "paths": path_map,
+        "definitions": schema_map,
+        "parameters": shared_parameters,
+    }
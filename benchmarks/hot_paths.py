@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Benchmarks the extract, parse and write hot paths offline against the fixtures in benchmarks/fixtures.py.
+
+Usage:
+    python benchmarks/hot_paths.py --revision HEAD~1        # measure HEAD~1 in a git worktree, then compare
+    python benchmarks/hot_paths.py --save-baseline          # save this checkout's numbers before changing it ...
+    python benchmarks/hot_paths.py                          # ... and compare the working tree against them
+    python benchmarks/hot_paths.py --stage gcp --repeat 10  # only stages whose name contains "gcp"
+    python benchmarks/hot_paths.py --json results.json --no-compare  # just record the measurements
+
+Each stage is timed over several repeats (median wall time), then run once
+more under tracemalloc for its peak and retained memory. Wall times only
+compare on the same machine, so the baseline comes from the same machine:
+either measured from ``--revision`` on the spot (these fixtures and stages,
+that revision's code), or saved earlier with ``--save-baseline`` and stamped
+with the machine. A stage that exceeds the baseline by more than the
+tolerance fails the run; stages the reference code lacks are not compared.
+Against a baseline from another machine only memory is checked, and a
+missing baseline is an error unless ``--no-compare`` is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks import fixtures  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.local.json"
+DEFAULT_REPEAT = 3
+DEFAULT_TIME_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.10
+
+
+def machine() -> Dict[str, object]:
+    """Identifies the interpreter and hardware, so wall times are only compared on the same machine."""
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "system": platform.system(),
+        "arch": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _timed(func: Callable[[], object]) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _aws_stages(model):
+    from extractors.aws_extractor import ShapeGraph, convert_shape_to_schema
+    from utils.schema_parser import parse_schema_tree
+
+    shapes = model["shapes"]
+    input_shapes = [op["input"]["shape"] for op in model["operations"].values()]
+
+    def shape_graph():
+        graph = ShapeGraph(shapes)
+        return [graph.render(name) for name in input_shapes]
+
+    def shape_to_schema():
+        return [parse_schema_tree(convert_shape_to_schema(name, shapes), {}) for name in input_shapes]
+
+    return {"aws.shape_graph": shape_graph, "aws.convert_shape_to_schema": shape_to_schema}
+
+
+def _gcp_stages(doc):
+    from extractors.gcp_extractor import build_gcp_operations
+
+    return {"gcp.build_operations": lambda: build_gcp_operations("compute", doc)}
+
+
+class _FixtureDocuments:
+    """Serves the fixture in place of the downloaded-spec cache so refs resolve offline."""
+
+    def __init__(self, url, document):
+        self._entry = (document, "fixture")
+        self._url = url
+
+    def get(self, url):
+        if url != self._url:
+            raise RuntimeError(f"No fixture for {url}")
+        return self._entry
+
+
+def _azure_stages(doc):
+    from extractors.azure_extractor import SpecResolver, _absolutize_refs, _build_operations
+
+    url = "https://fixtures.invalid/network.json"
+    _absolutize_refs(doc, url)
+    documents = _FixtureDocuments(url, doc)
+
+    def build_operations():
+        return _build_operations(doc, SpecResolver(documents), {}, set(), set())
+
+    return {"azure.build_operations": build_operations}
+
+
+def _write_stages(runs_by_provider, output_dir: Path):
+    from writer import write_output
+
+    def writer(provider, output_format, streaming=False):
+        runs = runs_by_provider[provider]
+        suffix = "-streaming" if streaming else ""
+        path = output_dir / f"{provider}{suffix}.{output_format}"
+        return lambda: write_output(runs, str(path), provider, output_format, streaming=streaming)
+
+    stages = {}
+    if "aws" in runs_by_provider:
+        stages["write.xlsx.aws"] = writer("aws", "xlsx")
+    if "gcp" in runs_by_provider:
+        stages["write.xlsx.gcp"] = writer("gcp", "xlsx")
+        stages["write.xlsx_streaming.gcp"] = writer("gcp", "xlsx", streaming=True)
+        stages["write.jsonl.gcp"] = writer("gcp", "jsonl")
+    return stages
+
+
+def build_stages(output_dir: Path) -> Dict[str, Callable[[], object]]:
+    aws_model = fixtures.aws_model()
+    stage_groups = (
+        ("aws", lambda: _aws_stages(aws_model)),
+        ("gcp", lambda: _gcp_stages(fixtures.discovery_doc())),
+        ("azure", lambda: _azure_stages(fixtures.azure_swagger())),
+    )
+
+    stages = {}
+    for provider, build in stage_groups:
+        try:
+            stages.update(build())
+        except ImportError as exc:
+            # An older revision measured with --revision may predate the code a stage exercises.
+            print(f"⚠️ Skipping the {provider} stages: {exc}")
+
+    runs_by_provider = {}
+    if "aws.shape_graph" in stages:
+        aws_ops = [
+            {"apiPath": "/", "resource": "ec2", "method": name, "tree": tree}
+            for name, tree in zip(aws_model["operations"], stages["aws.shape_graph"]())
+        ]
+        runs_by_provider["aws"] = [{"key": "ec2", "label": "ec2", "data": aws_ops}]
+    if "gcp.build_operations" in stages:
+        runs_by_provider["gcp"] = [{"key": "compute", "label": "compute", "data": stages["gcp.build_operations"]()}]
+    try:
+        stages.update(_write_stages(runs_by_provider, output_dir))
+    except ImportError as exc:
+        print(f"⚠️ Skipping the write stages: {exc}")
+    return stages
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    func()  # warm-up: imports, lazily built caches
+    samples = [_timed(func) * 1000 for _ in range(max(1, repeat))]
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before_bytes, _ = tracemalloc.get_traced_memory()
+        before_blocks = sys.getallocatedblocks()
+        result = func()
+        after_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        retained_blocks = sys.getallocatedblocks() - before_blocks
+    finally:
+        tracemalloc.stop()
+    del result
+
+    return {
+        "wall_ms": statistics.median(samples),
+        "wall_ms_min": min(samples),
+        "peak_bytes": peak_bytes - before_bytes,
+        "retained_bytes": after_bytes - before_bytes,
+        "retained_blocks": retained_blocks,
+    }
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance, check_time=True) -> List[str]:
+    failures = []
+    for name, current in results["stages"].items():
+        previous = baseline["stages"].get(name)
+        if previous is None:
+            continue
+        if check_time and current["wall_ms"] > previous["wall_ms"] * (1 + time_tolerance):
+            failures.append(
+                f"{name}: {current['wall_ms']:.1f} ms vs {previous['wall_ms']:.1f} ms in the baseline "
+                f"(+{(current['wall_ms'] / previous['wall_ms'] - 1) * 100:.0f}%)"
+            )
+        allowed_bytes = previous["peak_bytes"] * (1 + memory_tolerance)
+        if current["peak_bytes"] > allowed_bytes and current["peak_bytes"] - previous["peak_bytes"] > 1024 * 1024:
+            failures.append(
+                f"{name}: peak memory {current['peak_bytes'] / 2**20:.1f} MiB vs "
+                f"{previous['peak_bytes'] / 2**20:.1f} MiB in the baseline"
+            )
+    return failures
+
+
+def _print_table(results, baseline):
+    print(f"{'stage':<30} {'wall ms':>10} {'baseline':>10} {'peak MiB':>10} {'retained':>10} {'blocks':>10}")
+    for name, stage in results["stages"].items():
+        previous = (baseline or {}).get("stages", {}).get(name)
+        expected = f"{previous['wall_ms']:10.1f}" if previous else f"{'-':>10}"
+        print(
+            f"{name:<30} {stage['wall_ms']:10.1f} {expected} {stage['peak_bytes'] / 2**20:10.1f} "
+            f"{stage['retained_bytes'] / 2**20:10.1f} {stage['retained_blocks']:10d}"
+        )
+
+
+def measure_revision(revision: str, args, baseline_path: Path) -> int:
+    """Runs this suite against ``revision``'s code in a temporary git worktree, saving it to ``baseline_path``."""
+    with tempfile.TemporaryDirectory(prefix="csp-bench-ref-") as tmp:
+        worktree = Path(tmp) / "tree"
+        added = subprocess.run(
+            ["git", "-C", str(ROOT_DIR), "worktree", "add", "--detach", str(worktree), revision],
+            capture_output=True,
+            text=True,
+        )
+        if added.returncode != 0:
+            print(f"❌ Unable to check out '{revision}': {added.stderr.strip()}")
+            return 2
+        try:
+            print(f"📏 Measuring {revision} as the baseline...")
+            command = [
+                sys.executable, str(Path(__file__).resolve()), "--root", str(worktree),
+                "--save-baseline", "--baseline", str(baseline_path), "--repeat", str(args.repeat),
+            ]
+            for stage in args.stage:
+                command += ["--stage", stage]
+            return subprocess.run(command).returncode
+        finally:
+            subprocess.run(
+                ["git", "-C", str(ROOT_DIR), "worktree", "remove", "--force", str(worktree)],
+                capture_output=True,
+            )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark extract, parse and write hot paths against offline fixtures.")
+    parser.add_argument("--stage", action="append", default=[], help="Only run stages whose name contains this (repeatable).")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"Timed runs per stage (default: {DEFAULT_REPEAT}).")
+    parser.add_argument("--json", dest="json_path", type=Path, help="Write the measurements to this JSON file.")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help=f"Baseline to compare against (default: {BASELINE_PATH.name}, next to this script).",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Write this run to --baseline instead of comparing; run it on the reference code first.",
+    )
+    mode.add_argument(
+        "--revision",
+        help="Measure this git revision in a temporary worktree and compare against it instead of --baseline.",
+    )
+    mode.add_argument("--no-compare", action="store_true", help="Only measure; don't require or check a baseline.")
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TIME_TOLERANCE,
+        help=f"Allowed wall-time regression as a fraction (default: {DEFAULT_TIME_TOLERANCE}).",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=DEFAULT_MEMORY_TOLERANCE,
+        help=f"Allowed peak-memory regression as a fraction (default: {DEFAULT_MEMORY_TOLERANCE}).",
+    )
+    args = parser.parse_args(argv)
+    if args.root:
+        # Measure another checkout's code with this checkout's fixtures and stages.
+        sys.path.insert(0, str(args.root.resolve()))
+
+    if not args.revision:
+        return _run(args)
+    with tempfile.TemporaryDirectory(prefix="csp-bench-baseline-") as tmp:
+        args.baseline = Path(tmp) / "baseline.json"
+        status = measure_revision(args.revision, args, args.baseline)
+        if status != 0:
+            return status
+        print("📏 Measuring the working tree...")
+        return _run(args)
+
+
+def _run(args) -> int:
+    with tempfile.TemporaryDirectory(prefix="csp-bench-") as tmp:
+        stages = build_stages(Path(tmp))
+        selected = [name for name in stages if not args.stage or any(part in name for part in args.stage)]
+        if not selected:
+            print(f"❌ No stage matches {', '.join(args.stage)}. Stages: {', '.join(stages) or 'none'}.")
+            return 2
+
+        results = {"machine": machine(), "stages": {}}
+        for name in selected:
+            results["stages"][name] = measure(stages[name], args.repeat)
+
+    baseline = None
+    if not args.save_baseline and not args.no_compare and args.baseline.is_file():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    _print_table(results, baseline)
+
+    if args.json_path:
+        args.json_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.save_baseline:
+        if args.stage and args.baseline.is_file():
+            merged = json.loads(args.baseline.read_text(encoding="utf-8"))
+            if merged.get("machine") == results["machine"]:
+                merged["stages"].update(results["stages"])
+                results = merged
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    if args.no_compare:
+        return 0
+    if baseline is None:
+        print(
+            f"❌ No baseline at {args.baseline}. Compare against a revision with --revision REV, save one with "
+            "--save-baseline on the reference code, or pass --no-compare to only measure."
+        )
+        return 1
+
+    same_machine = baseline.get("machine") == results["machine"]
+    if not same_machine:
+        print("⚠️ The baseline was measured on another machine; only peak memory is compared.")
+    failures = compare(results, baseline, args.tolerance, args.memory_tolerance, check_time=same_machine)
+    if failures:
+        print("\n❌ Performance regression against the baseline:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ No stage regressed beyond the baseline tolerance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measures how long fetch_api_params.py takes from launch to its first prompt.
+
+Usage:
+    python benchmarks/startup_time.py                  # time-to-prompt, 5 runs
+    python benchmarks/startup_time.py --runs 20        # more samples
+    python benchmarks/startup_time.py --importtime     # also show the slowest imports (python -X importtime)
+    python benchmarks/startup_time.py --max-ms 250     # exit 1 if the median exceeds 250 ms (for CI)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+CLI_PATH = ROOT_DIR / "fetch_api_params.py"
+FIRST_PROMPT = "Enter CSP".encode("utf-8")
+PROMPT_TIMEOUT = 30.0
+
+
+def time_to_prompt() -> float:
+    """Launches the interactive CLI and returns the seconds until the provider prompt is printed."""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(CLI_PATH)],
+        cwd=ROOT_DIR,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    output = b""
+    try:
+        while FIRST_PROMPT not in output:
+            chunk = proc.stdout.read1(4096) if hasattr(proc.stdout, "read1") else proc.stdout.read(1)
+            if not chunk:
+                raise RuntimeError(f"CLI exited before prompting. Output so far: {output.decode('utf-8', 'replace')!r}")
+            output += chunk
+            if time.perf_counter() - start > PROMPT_TIMEOUT:
+                raise RuntimeError("Timed out waiting for the first prompt.")
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.communicate()
+
+
+def slowest_imports(limit: int) -> List[Tuple[int, str]]:
+    """Returns ``(cumulative_us, module)`` for the slowest imports triggered by ``import fetch_api_params``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import fetch_api_params"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        timings.append((int(cumulative), module.strip()))
+    timings.sort(reverse=True)
+    return timings[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fetch_api_params.py startup latency.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of launches to time (default: 5).")
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports of fetch_api_params.")
+    parser.add_argument("--top", type=int, default=15, help="How many imports to list with --importtime.")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median time-to-prompt exceeds this many milliseconds.")
+    parser.add_argument("--json", dest="json_path", type=Path, help="Write the measurements to this JSON file.")
+    args = parser.parse_args(argv)
+
+    # One untimed launch so .pyc compilation and a cold disk cache don't skew the first sample.
+    time_to_prompt()
+    samples = [time_to_prompt() * 1000 for _ in range(max(1, args.runs))]
+    median_ms = statistics.median(samples)
+    print(f"⏱️ Time to first prompt over {len(samples)} runs: "
+          f"median {median_ms:.1f} ms, min {min(samples):.1f} ms, max {max(samples):.1f} ms")
+
+    report = {"python": sys.version.split()[0], "runs_ms": samples, "median_ms": median_ms}
+    if args.importtime:
+        imports = slowest_imports(args.top)
+        print("\nSlowest imports (cumulative):")
+        for cumulative, module in imports:
+            print(f"  {cumulative / 1000:8.1f} ms  {module}")
+        report["slowest_imports_us"] = [{"module": module, "cumulative_us": us} for us, module in imports]
+
+    if args.json_path:
+        args.json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"❌ Median startup {median_ms:.1f} ms exceeds the {args.max_ms:.1f} ms budget.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,146 @@
+from functools import lru_cache
+
+import botocore
 import botocore.session
 from botocore.exceptions import DataNotFoundError, UnknownServiceError
 
-from utils.schema_parser import parse_schema_tree
-
+from utils.result_cache import cached_extraction
+from utils.tracing import span
 
-def extract_aws_service_apis(service):
+@lru_cache(maxsize=1)
+def _get_loader():
     session = botocore.session.get_session()
-    loader = session.get_component("data_loader")
+    return session.get_component("data_loader")
+
 
+@lru_cache(maxsize=8)
+def _load_shape_graph(service):
     try:
-        service_model = loader.load_service_model(service, "service-2")
+        service_model = _get_loader().load_service_model(service, "service-2")
     except (UnknownServiceError, DataNotFoundError) as exc:
         raise RuntimeError(
             f"AWS service '{service}' is not available in the local Botocore models."
         ) from exc
+    return service_model, ShapeGraph(service_model.get("shapes", {}) or {})
+
+
+class ShapeGraph:
+    """Renders ``(level, label)`` rows straight from a ``service-2`` shape table.
+
+    Rows are memoized per shape with levels relative to the shape. Expansions
+    cut short by a recursive reference depend on their ancestors, so those are
+    never memoized.
+    """
+
+    __slots__ = ("_shapes", "_rows")
+
+    def __init__(self, shapes):
+        self._shapes = shapes
+        self._rows = {}
+
+    def render(self, shape_name):
+        if not shape_name or shape_name not in self._shapes:
+            return []
+        rows, _ = self._container_rows(shape_name, set())
+        return list(rows)
+
+    def _container_rows(self, shape_name, visiting):
+        cached = self._rows.get(shape_name)
+        if cached is not None:
+            return cached, False
+
+        shape = self._shapes.get(shape_name, {})
+        shape_type = shape.get("type", "structure")
+        rows = []
+        truncated = False
+
+        visiting.add(shape_name)
+        try:
+            if shape_type == "structure":
+                for member_name, spec in (shape.get("members", {}) or {}).items():
+                    truncated |= self._member_rows(rows, member_name, spec.get("shape"), visiting)
+            elif shape_type == "map":
+                truncated |= self._member_rows(rows, "Key", shape.get("key", {}).get("shape"), visiting)
+                truncated |= self._member_rows(rows, "Value", shape.get("value", {}).get("shape"), visiting)
+            elif shape_type == "list":
+                member_shape_name = shape.get("member", {}).get("shape")
+                if member_shape_name and member_shape_name not in visiting:
+                    child_rows, truncated = self._container_rows(member_shape_name, visiting)
+                    rows.extend(child_rows)
+                elif member_shape_name:
+                    truncated = True
+        finally:
+            visiting.discard(shape_name)
+
+        rows = tuple(rows)
+        if not truncated:
+            self._rows[shape_name] = rows
+        return rows, truncated
+
+    def _member_rows(self, rows, member_name, target_name, visiting):
+        if not target_name:
+            rows.append((0, f"{member_name} (string)"))
+            return False
+        if target_name in visiting:
+            rows.append((0, member_name))
+            return True
+
+        target_type = self._shapes.get(target_name, {}).get("type", "structure")
+        if target_type in ("structure", "map"):
+            rows.append((0, member_name))
+        elif target_type == "list":
+            rows.append((0, f"{member_name} [array]"))
+        else:
+            rows.append((0, f"{member_name} ({target_type or 'string'})"))
+            return False
+
+        child_rows, truncated = self._container_rows(target_name, visiting)
+        rows.extend((level + 1, label) for level, label in child_rows)
+        return truncated
+
+
+def list_aws_services():
+    # Shares the loader (and its directory-listing cache) with extraction instead of
+    # building a second botocore session.
+    return sorted(_get_loader().list_available_services("service-2"))
+
+
+def spec_fingerprint(service):
+    try:
+        api_version = _get_loader().determine_latest_version(service, "service-2")
+    except (UnknownServiceError, DataNotFoundError) as exc:
+        raise RuntimeError(
+            f"AWS service '{service}' is not available in the local Botocore models."
+        ) from exc
+    return f"botocore-{botocore.__version__}:{service}:{api_version}"
+
+
+def resolve_aws_spec(service):
+    """Returns ``(fingerprint, build)``; ``build()`` parses the service model into operations."""
+    return spec_fingerprint(service), lambda: _build_operations(service)
+
+
+def extract_aws_service_apis(service):
+    return cached_extraction("aws", service, *resolve_aws_spec(service))
+
+
+def _build_operations(service):
+    with span("aws.load_model", service=service):
+        service_model, shape_graph = _load_shape_graph(service)
+    with span("aws.build_tree", service=service) as phase:
+        output_data = _render_operations(service, service_model, shape_graph)
+        phase.add(operations=len(output_data), rows=sum(len(item["tree"]) for item in output_data))
+    return output_data
+
 
+def _render_operations(service, service_model, shape_graph):
     operations = service_model.get("operations", {}) or {}
-    shapes = service_model.get("shapes", {}) or {}
 
     output_data = []
 
     for op_name, op_info in operations.items():
         input_shape_name = op_info.get("input", {}).get("shape")
-        tree = []
-        if input_shape_name and input_shape_name in shapes:
-            schema = convert_shape_to_schema(input_shape_name, shapes)
-            tree = parse_schema_tree(schema, {})
+        tree = shape_graph.render(input_shape_name)
 
         http_info = op_info.get("http", {}) or {}
         api_path = http_info.get("requestUri") or op_name
@@ -1,121 +1,375 @@
+import hashlib
+import json
+import os
 import posixpath
 import re
-from typing import Dict, Iterable, List, Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import unquote, urljoin
 
-import requests
 from requests import RequestException
 
+from utils.cache_manager import load_service_cache, provider_entry, update_service_cache
+from utils.http_cache import cached_http_get
+from utils.result_cache import cached_extraction
 from utils.schema_parser import parse_schema_tree
+from utils.tracing import span
 
 RAW_SPEC_BASE = "https://raw.githubusercontent.com/Azure/azure-rest-api-specs/main"
-README_TEMPLATE = RAW_SPEC_BASE + "/specification/{service}/resource-manager/readme.md"
+README_TEMPLATE = RAW_SPEC_BASE + "/specification/{service}/{plane}/readme.md"
+# Management-plane specs first; services that only publish data-plane APIs fall back to those.
+README_PLANES = ("resource-manager", "data-plane")
 REQUEST_TIMEOUT = 30
 HTTP_METHODS = {"get", "put", "post", "delete", "patch", "options", "head"}
+MAX_SPEC_DOWNLOADS = 8
+MAX_CACHED_DOCUMENTS = 256
+# Parsed documents are revalidated (a conditional GET through the HTTP cache) once they are this old.
+DOCUMENT_TTL_ENV = "CSP_AZURE_DOCUMENT_TTL"
+DEFAULT_DOCUMENT_TTL_SECONDS = 600
+
+INPUT_FILE_PATTERN = re.compile(r"input-file:\s*\n(?P<body>(?:[ \t]+\-\s+[^\n]+\n)+)", re.IGNORECASE)
+YAML_BLOCK_PATTERN = re.compile(r"```\s*yaml(?P<condition>[^\n]*)\n(?P<body>.*?)```", re.DOTALL | re.IGNORECASE)
+TAG_CONDITION_PATTERN = re.compile(r"\$\(tag\)\s*==\s*['\"](?P<tag>[^'\"]+)['\"]")
+DEFAULT_TAG_PATTERN = re.compile(r"^tag:\s*['\"]?(?P<tag>[^'\"\s]+)", re.MULTILINE)
 
 
 def _fetch_text(url: str) -> str:
     try:
-        resp = requests.get(url, timeout=REQUEST_TIMEOUT)
+        resp = cached_http_get(url, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
         return resp.text
     except RequestException as exc:
         raise RuntimeError(f"Unable to download Azure README from {url}: {exc}") from exc
 
 
-def _fetch_json(url: str) -> dict:
+async def _fetch_text_async(url: str) -> str:
+    from utils import async_http
+
     try:
-        resp = requests.get(url, timeout=REQUEST_TIMEOUT)
+        resp = await async_http.get(url, timeout=REQUEST_TIMEOUT, cached=True)
         resp.raise_for_status()
-        return resp.json()
+        return resp.text
     except RequestException as exc:
-        raise RuntimeError(f"Unable to download Azure OpenAPI document from {url}: {exc}") from exc
-    except ValueError as exc:
-        raise RuntimeError(f"Received invalid JSON payload from {url}: {exc}") from exc
+        raise RuntimeError(f"Unable to download Azure README from {url}: {exc}") from exc
+
+
+def _decode_spec(url: str, resp) -> Tuple[dict, str]:
+    resp.raise_for_status()
+    body = resp.content
+    with span("json.decode", url=url) as phase:
+        phase.add(bytes=len(body))
+        document = json.loads(body)
+    return document, hashlib.sha256(body).hexdigest()
+
+
+def _spec_error(url: str, exc: Exception) -> RuntimeError:
+    if isinstance(exc, RequestException):
+        return RuntimeError(f"Unable to download Azure OpenAPI document from {url}: {exc}")
+    return RuntimeError(f"Received invalid JSON payload from {url}: {exc}")
 
 
-def _extract_input_files(readme_text: str) -> List[str]:
-    pattern = re.compile(r"input-file:\s*\n(?P<body>(?:[ \t]+\-\s+[^\n]+\n)+)", re.IGNORECASE)
-    match = pattern.search(readme_text)
+def _fetch_spec(url: str) -> Tuple[dict, str]:
+    try:
+        return _decode_spec(url, cached_http_get(url, timeout=REQUEST_TIMEOUT))
+    except (RequestException, ValueError) as exc:
+        raise _spec_error(url, exc) from exc
+
+
+async def _fetch_spec_async(url: str) -> Tuple[dict, str]:
+    from utils import async_http
+
+    try:
+        resp = await async_http.get(url, timeout=REQUEST_TIMEOUT, cached=True)
+        return await async_http.run_blocking(_decode_spec, url, resp)
+    except (RequestException, ValueError) as exc:
+        raise _spec_error(url, exc) from exc
+
+
+def _parse_input_file_list(text: str) -> List[str]:
+    match = INPUT_FILE_PATTERN.search(text)
     if not match:
         return []
     files = []
     for line in match.group("body").splitlines():
         stripped = line.strip()
         if stripped.startswith("-"):
-            path = stripped[1:].strip()
-            if path:
+            path = stripped[1:].strip().strip("'\"")
+            if path and path not in files:
                 files.append(path)
     return files
 
 
-def _resolve_spec_url(service: str, relative_path: str) -> str:
-    base_dir = f"specification/{service}/resource-manager"
-    relative_path = relative_path.lstrip("/")
-    joined = posixpath.normpath(posixpath.join(base_dir, relative_path))
-    return f"{RAW_SPEC_BASE}/{joined}"
-
-
-def _build_schema_lookup(openapi_doc: dict) -> Dict[str, dict]:
-    schemas = {}
-
-    for name, schema in (openapi_doc.get("definitions") or {}).items():
-        schemas[f"#/definitions/{name}"] = schema
-
-    components = openapi_doc.get("components") or {}
-    for name, schema in (components.get("schemas") or {}).items():
-        schemas[f"#/components/schemas/{name}"] = schema
-
-    return schemas
-
+def _select_default_tag(readme_text: str) -> Optional[str]:
+    for block in YAML_BLOCK_PATTERN.finditer(readme_text):
+        if TAG_CONDITION_PATTERN.search(block.group("condition")):
+            continue
+        match = DEFAULT_TAG_PATTERN.search(block.group("body"))
+        if match:
+            return match.group("tag")
+    return None
 
-def _build_request_body_lookup(openapi_doc: dict) -> Dict[str, dict]:
-    components = openapi_doc.get("components") or {}
-    return components.get("requestBodies") or {}
 
+def _extract_input_files(readme_text: str, tag: Optional[str] = None) -> List[str]:
+    if tag:
+        for block in YAML_BLOCK_PATTERN.finditer(readme_text):
+            condition = TAG_CONDITION_PATTERN.search(block.group("condition"))
+            if condition and condition.group("tag") == tag:
+                files = _parse_input_file_list(block.group("body"))
+                if files:
+                    return files
+    return _parse_input_file_list(readme_text)
 
-def _build_component_parameters(openapi_doc: dict) -> Tuple[Dict[str, dict], Dict[str, dict]]:
-    legacy_params = openapi_doc.get("parameters") or {}
-    components = openapi_doc.get("components") or {}
-    component_params = components.get("parameters") or {}
-    return legacy_params, component_params
 
+def _resolve_spec_url(readme_url: str, relative_path: str) -> str:
+    base_dir = posixpath.dirname(readme_url[len(RAW_SPEC_BASE) + 1:])
+    relative_path = relative_path.lstrip("/")
+    joined = posixpath.normpath(posixpath.join(base_dir, relative_path))
+    return f"{RAW_SPEC_BASE}/{joined}"
 
-def _resolve_parameter_ref(ref: str, legacy_params: Dict[str, dict], component_params: Dict[str, dict]) -> dict:
-    if ref.startswith("#/parameters/"):
-        key = ref.split("/")[-1]
-        return legacy_params.get(key, {})
-    if ref.startswith("#/components/parameters/"):
-        key = ref.split("/")[-1]
-        return component_params.get(key, {})
-    return {}
 
+def _remember_readme(service: str, readme_url: str) -> None:
+    def record(cache):
+        provider_entry(cache, "azure").setdefault("readmes", {})[service] = readme_url
 
-def _iter_parameters(parameter_list: Iterable[dict], legacy_params: Dict[str, dict], component_params: Dict[str, dict]):
+    try:
+        update_service_cache(record)
+    except OSError as exc:
+        print(f"⚠️ Unable to update the service catalog cache: {exc}")
+
+
+def _readme_candidates(service: str) -> Tuple[List[str], Optional[str]]:
+    """Returns ``(candidate_urls, cached_url)``, with the README location cached for ``service`` first."""
+    candidates = [README_TEMPLATE.format(service=service, plane=plane) for plane in README_PLANES]
+    cached_url = ((load_service_cache().get("providers", {}).get("azure") or {}).get("readmes") or {}).get(service)
+    if cached_url:
+        candidates = [cached_url] + [url for url in candidates if url != cached_url]
+    return candidates, cached_url
+
+
+def _fetch_readme(service: str) -> Tuple[str, str]:
+    """Returns ``(readme_url, text)``, trying the README location cached for ``service`` first."""
+    candidates, cached_url = _readme_candidates(service)
+    errors = []
+    for readme_url in candidates:
+        try:
+            readme_text = _fetch_text(readme_url)
+        except RuntimeError as exc:
+            errors.append(exc)
+            continue
+        if readme_url != cached_url:
+            _remember_readme(service, readme_url)
+        return readme_url, readme_text
+    raise errors[0]
+
+
+async def _fetch_readme_async(service: str) -> Tuple[str, str]:
+    from utils.async_http import run_blocking
+
+    candidates, cached_url = await run_blocking(_readme_candidates, service)
+    errors = []
+    for readme_url in candidates:
+        try:
+            readme_text = await _fetch_text_async(readme_url)
+        except RuntimeError as exc:
+            errors.append(exc)
+            continue
+        if readme_url != cached_url:
+            await run_blocking(_remember_readme, service, readme_url)
+        return readme_url, readme_text
+    raise errors[0]
+
+
+def _absolutize_refs(document, base_url: str) -> Set[str]:
+    """Rewrites every ``$ref`` in ``document`` to an absolute URL; returns the other documents they point into."""
+    referenced = set()
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                node["$ref"] = urljoin(base_url, ref)
+                referenced.add(node["$ref"].partition("#")[0])
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+    referenced.discard(base_url)
+    referenced.discard("")
+    return referenced
+
+
+def _referenced_urls(document) -> Set[str]:
+    """The documents that the (already absolute) ``$ref``s of ``document`` point into."""
+    referenced = set()
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            ref = node.get("$ref")
+            if isinstance(ref, str):
+                referenced.add(ref.partition("#")[0])
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+    referenced.discard("")
+    return referenced
+
+
+def _resolve_pointer(document, pointer: str):
+    node = document
+    for token in unquote(pointer).lstrip("/").split("/"):
+        if not token:
+            continue
+        token = token.replace("~1", "/").replace("~0", "~")
+        if isinstance(node, dict):
+            node = node.get(token)
+        elif isinstance(node, list) and token.isdigit() and int(token) < len(node):
+            node = node[int(token)]
+        else:
+            return None
+        if node is None:
+            return None
+    return node
+
+
+def document_ttl() -> float:
+    try:
+        return max(0.0, float(os.environ.get(DOCUMENT_TTL_ENV, DEFAULT_DOCUMENT_TTL_SECONDS)))
+    except ValueError:
+        return DEFAULT_DOCUMENT_TTL_SECONDS
+
+
+class SpecDocumentCache:
+    """Downloads each Azure spec document once and keeps it parsed in memory for ``ttl`` seconds.
+
+    Every ``$ref`` in a cached document is rewritten to an absolute
+    ``url#/pointer`` so references keep pointing at the right file once the
+    schema is handed to a resolver for another document. Expired documents
+    are fetched again, so long-running callers pick up upstream changes.
+    """
+
+    def __init__(self, max_documents: int = MAX_CACHED_DOCUMENTS, ttl: Optional[float] = None):
+        self._max_documents = max_documents
+        self._ttl = ttl
+        self._documents: "OrderedDict[str, Tuple[dict, str]]" = OrderedDict()
+        self._fetched_at: Dict[str, float] = {}
+        self._references: Dict[str, Set[str]] = {}
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, url: str) -> Optional[Tuple[dict, str]]:
+        ttl = document_ttl() if self._ttl is None else self._ttl
+        with self._lock:
+            entry = self._documents.get(url)
+            if entry is None:
+                return None
+            if time.monotonic() - self._fetched_at[url] >= ttl:
+                self._forget(url)
+                return None
+            self._documents.move_to_end(url)
+            return entry
+
+    def _forget(self, url: str) -> None:
+        self._documents.pop(url, None)
+        self._fetched_at.pop(url, None)
+        self._references.pop(url, None)
+
+    def get(self, url: str) -> Tuple[dict, str]:
+        entry = self.lookup(url)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            entry = self.lookup(url)
+            if entry is not None:
+                return entry
+            entry = self.add(url, *_fetch_spec(url))
+            with self._lock:
+                self._url_locks.pop(url, None)
+        return entry
+
+    def add(self, url: str, openapi_doc: dict, blob_hash: str) -> Tuple[dict, str]:
+        """Stores a freshly downloaded document (rewriting its refs) and returns its entry."""
+        references = _absolutize_refs(openapi_doc, url)
+        entry = (openapi_doc, blob_hash)
+        with self._lock:
+            self._documents[url] = entry
+            self._documents.move_to_end(url)
+            self._fetched_at[url] = time.monotonic()
+            self._references[url] = references
+            while len(self._documents) > self._max_documents:
+                self._forget(next(iter(self._documents)))
+        return entry
+
+    def references(self, url: str, openapi_doc: dict) -> Set[str]:
+        """The other documents that the refs of ``openapi_doc`` (stored under ``url``) point into."""
+        with self._lock:
+            references = self._references.get(url)
+        if references is None:
+            references = _referenced_urls(openapi_doc) - {url}
+        return references
+
+
+_DOCUMENTS = SpecDocumentCache()
+
+
+class SpecResolver:
+    """Mapping-style lookup that resolves absolute refs lazily, fetching external documents on demand."""
+
+    def __init__(self, documents: SpecDocumentCache = _DOCUMENTS):
+        self._documents = documents
+        self._resolved: Dict[str, dict] = {}
+        self._failed_urls: Set[str] = set()
+
+    def get(self, ref: str, default=None):
+        if ref in self._resolved:
+            return self._resolved[ref]
+
+        url, _, pointer = ref.partition("#")
+        target = None
+        if url and url not in self._failed_urls:
+            try:
+                document, _ = self._documents.get(url)
+            except RuntimeError as exc:
+                self._failed_urls.add(url)
+                print(f"⚠️ Unable to resolve Azure reference '{ref}': {exc}")
+            else:
+                target = _resolve_pointer(document, pointer)
+
+        if not isinstance(target, dict):
+            target = default if default is not None else {}
+        self._resolved[ref] = target
+        return target
+
+
+def _iter_parameters(parameter_list: Iterable[dict], resolver: SpecResolver):
     for param in parameter_list or []:
         if not isinstance(param, dict):
             continue
         if "$ref" in param:
-            resolved = _resolve_parameter_ref(param["$ref"], legacy_params, component_params)
+            resolved = resolver.get(param["$ref"], {})
             if resolved:
                 yield resolved
             continue
         yield param
 
 
-def _dereference_request_body(request_body: dict, request_bodies: Dict[str, dict]) -> dict:
+def _dereference_request_body(request_body: dict, resolver: SpecResolver) -> dict:
     if "$ref" not in request_body:
         return request_body
-    ref = request_body["$ref"]
-    if ref.startswith("#/components/requestBodies/"):
-        key = ref.split("/")[-1]
-        return request_bodies.get(key, {})
-    return request_body
+    return resolver.get(request_body["$ref"], {})
 
 
-def _extract_schema_from_request(method_doc: dict, request_bodies: Dict[str, dict]):
+def _extract_schema_from_request(method_doc: dict, resolver: SpecResolver):
     request_body = method_doc.get("requestBody")
     if isinstance(request_body, dict):
-        deref = _dereference_request_body(request_body, request_bodies)
+        deref = _dereference_request_body(request_body, resolver)
         content = deref.get("content") or {}
         for media in content.values():
             schema = media.get("schema")
@@ -124,8 +378,8 @@ def _extract_schema_from_request(method_doc: dict, request_bodies: Dict[str, dic
     return None
 
 
-def _extract_schema_from_parameters(method_doc: dict, legacy_params: Dict[str, dict], component_params: Dict[str, dict]):
-    for param in _iter_parameters(method_doc.get("parameters"), legacy_params, component_params):
+def _extract_schema_from_parameters(method_doc: dict, resolver: SpecResolver):
+    for param in _iter_parameters(method_doc.get("parameters"), resolver):
         if param.get("in") == "body" and param.get("schema"):
             return param["schema"]
         if param.get("schema"):
@@ -133,9 +387,9 @@ def _extract_schema_from_parameters(method_doc: dict, legacy_params: Dict[str, d
     return None
 
 
-def _build_parameter_rows(method_doc: dict, legacy_params: Dict[str, dict], component_params: Dict[str, dict]):
+def _build_parameter_rows(method_doc: dict, resolver: SpecResolver):
     rows = []
-    for param in _iter_parameters(method_doc.get("parameters"), legacy_params, component_params):
+    for param in _iter_parameters(method_doc.get("parameters"), resolver):
         name = param.get("name", "parameter")
         label = name
         if param.get("required"):
@@ -147,48 +401,198 @@ def _build_parameter_rows(method_doc: dict, legacy_params: Dict[str, dict], comp
     return rows
 
 
-def _build_tree(method_doc: dict, schemas: Dict[str, dict], legacy_params: Dict[str, dict], component_params: Dict[str, dict], request_bodies: Dict[str, dict]):
-    schema = _extract_schema_from_request(method_doc, request_bodies)
+def _build_tree(method_doc: dict, resolver: SpecResolver, ref_memo: Dict[str, tuple]):
+    schema = _extract_schema_from_request(method_doc, resolver)
     if not schema:
-        schema = _extract_schema_from_parameters(method_doc, legacy_params, component_params)
+        schema = _extract_schema_from_parameters(method_doc, resolver)
 
     if schema:
-        parsed = parse_schema_tree(schema, schemas)
+        parsed = parse_schema_tree(schema, resolver, memo=ref_memo)
         if parsed:
             return parsed
 
-    return _build_parameter_rows(method_doc, legacy_params, component_params)
+    return _build_parameter_rows(method_doc, resolver)
 
 
-def extract_azure_service_apis(service):
-    readme_url = README_TEMPLATE.format(service=service)
-    readme_text = _fetch_text(readme_url)
-    swagger_paths = _extract_input_files(readme_text)
+def _fetch_spec_or_error(url: str):
+    try:
+        openapi_doc, blob_hash = _DOCUMENTS.get(url)
+    except RuntimeError as exc:
+        return url, None, None, str(exc)
+    return url, openapi_doc, blob_hash, None
+
+
+async def _fetch_spec_or_error_async(url: str):
+    from utils.async_http import run_blocking
+
+    entry = _DOCUMENTS.lookup(url)
+    try:
+        if entry is None:
+            openapi_doc, blob_hash = await _fetch_spec_async(url)
+            entry = await run_blocking(_DOCUMENTS.add, url, openapi_doc, blob_hash)
+    except RuntimeError as exc:
+        return url, None, None, str(exc)
+    return (url, *entry, None)
+
+
+def _fetch_specs(urls: List[str]) -> List[Tuple[str, dict, str]]:
+    workers = max(1, min(MAX_SPEC_DOWNLOADS, len(urls)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return _collect_specs(executor.map(_fetch_spec_or_error, urls))
+
+
+async def _fetch_specs_async(urls: List[str]) -> List[Tuple[str, dict, str]]:
+    import asyncio
+
+    return _collect_specs(await asyncio.gather(*(_fetch_spec_or_error_async(url) for url in urls)))
+
+
+def _collect_specs(results) -> List[Tuple[str, dict, str]]:
+    specs = []
+    errors = []
+    for url, openapi_doc, blob_hash, error in results:
+        if error:
+            errors.append(error)
+        else:
+            specs.append((url, openapi_doc, blob_hash))
 
+    if not specs:
+        raise RuntimeError(errors[0] if errors else "No Azure OpenAPI documents were downloaded.")
+    for error in errors:
+        print(f"⚠️ Skipping Azure OpenAPI document: {error}")
+    return specs
+
+
+def _swagger_urls(service: str, readme_url: str, readme_text: str) -> List[str]:
+    swagger_paths = _extract_input_files(readme_text, _select_default_tag(readme_text))
     if not swagger_paths:
         raise RuntimeError(f"Could not locate 'input-file' entries in Azure README for '{service}'.")
+    return [_resolve_spec_url(readme_url, path) for path in swagger_paths]
+
+
+def _scan_references(results, seen: Set[str]):
+    """Returns ``(url, blob_hash)`` for each fetched document and the URLs they reference that aren't in ``seen``."""
+    documents = []
+    pending = set()
+    for url, openapi_doc, blob_hash, error in results:
+        # A document that can't be fetched still counts, so the fingerprint changes once it can.
+        documents.append((url, "unavailable" if error else blob_hash))
+        if not error:
+            pending |= _DOCUMENTS.references(url, openapi_doc)
+    return documents, sorted(pending - seen)
+
+
+def _referenced_documents(specs: List[Tuple[str, dict, str]]) -> List[Tuple[str, str]]:
+    """Fetches every document the input files reach through ``$ref``s (common-types, sibling files)."""
+    seen = {url for url, _, _ in specs}
+    _, pending = _scan_references([(*spec, None) for spec in specs], seen)
+    documents = []
+    if not pending:
+        return documents
+    with ThreadPoolExecutor(max_workers=MAX_SPEC_DOWNLOADS) as executor:
+        while pending:
+            seen.update(pending)
+            found, pending = _scan_references(executor.map(_fetch_spec_or_error, pending), seen)
+            documents.extend(found)
+    return documents
+
+
+async def _referenced_documents_async(specs: List[Tuple[str, dict, str]]) -> List[Tuple[str, str]]:
+    import asyncio
+
+    seen = {url for url, _, _ in specs}
+    _, pending = _scan_references([(*spec, None) for spec in specs], seen)
+    documents = []
+    while pending:
+        seen.update(pending)
+        results = await asyncio.gather(*(_fetch_spec_or_error_async(url) for url in pending))
+        found, pending = _scan_references(results, seen)
+        documents.extend(found)
+    return documents
+
+
+def _resolved_spec(service: str, specs: List[Tuple[str, dict, str]], referenced: List[Tuple[str, str]]):
+    # Referenced documents feed the tree too, so a change to common-types alone must change the fingerprint.
+    inputs = [(url, blob_hash) for url, _, blob_hash in specs]
+    fingerprint = hashlib.sha256(
+        "\n".join(f"{url}:{blob_hash}" for url, blob_hash in inputs + sorted(referenced)).encode("utf-8")
+    ).hexdigest()
+    return fingerprint, partial(_build_service_operations, service, [openapi_doc for _, openapi_doc, _ in specs])
+
+
+def resolve_azure_spec(service):
+    """Downloads the README, every input-file and the documents they reference; returns ``(fingerprint, build)``."""
+    readme_url, readme_text = _fetch_readme(service)
+    specs = _fetch_specs(_swagger_urls(service, readme_url, readme_text))
+    return _resolved_spec(service, specs, _referenced_documents(specs))
+
+
+def extract_azure_service_apis(service):
+    return cached_extraction("azure", service, *resolve_azure_spec(service))
+
+
+async def resolve_azure_spec_async(service):
+    """Async ``resolve_azure_spec``: downloads are awaited concurrently and JSON decoding runs on the loop's executor."""
+    readme_url, readme_text = await _fetch_readme_async(service)
+    specs = await _fetch_specs_async(_swagger_urls(service, readme_url, readme_text))
+    return _resolved_spec(service, specs, await _referenced_documents_async(specs))
+
 
-    swagger_url = _resolve_spec_url(service, swagger_paths[0])
-    openapi_doc = _fetch_json(swagger_url)
+async def extract_azure_service_apis_async(service, executor=None):
+    """Async ``extract_azure_service_apis``; the result cache and tree building run on ``executor``.
 
-    schemas = _build_schema_lookup(openapi_doc)
-    request_bodies = _build_request_body_lookup(openapi_doc)
-    legacy_params, component_params = _build_component_parameters(openapi_doc)
+    ``executor`` defaults to the loop's thread pool. With a ``ProcessPoolExecutor``,
+    refs into documents other than the service's own specs are fetched again in
+    the worker, usually from the HTTP document cache.
+    """
+    from utils.async_http import run_blocking
 
-    paths = openapi_doc.get("paths") or {}
-    if not paths:
-        raise RuntimeError(f"The Azure OpenAPI document for '{service}' does not contain any paths.")
+    fingerprint, build = await resolve_azure_spec_async(service)
+    return await run_blocking(cached_extraction, "azure", service, fingerprint, build, executor=executor)
 
+
+def _build_service_operations(service: str, openapi_docs: List[dict]) -> List[dict]:
     output_data = []
+    seen_operations: Set[str] = set()
+    seen_routes: Set[Tuple[str, str]] = set()
+    resolver = SpecResolver()
+    ref_memo: Dict[str, tuple] = {}
+
+    with span("azure.build_tree", service=service) as phase:
+        for openapi_doc in openapi_docs:
+            output_data.extend(_build_operations(openapi_doc, resolver, ref_memo, seen_operations, seen_routes))
+        phase.add(operations=len(output_data), rows=sum(len(item["tree"]) for item in output_data), refs=len(ref_memo))
+
+    if not output_data and not any(openapi_doc.get("paths") for openapi_doc in openapi_docs):
+        raise RuntimeError(f"The Azure OpenAPI documents for '{service}' do not contain any paths.")
+    return output_data
 
-    for api_path, path_item in paths.items():
+
+def _build_operations(
+    openapi_doc: dict,
+    resolver: SpecResolver,
+    ref_memo: Dict[str, tuple],
+    seen_operations: Set[str],
+    seen_routes: Set[Tuple[str, str]],
+) -> List[dict]:
+    output_data = []
+
+    for api_path, path_item in (openapi_doc.get("paths") or {}).items():
         if not isinstance(path_item, dict):
             continue
         for method_name, method_doc in path_item.items():
             if method_name.lower() not in HTTP_METHODS:
                 continue
-            method_label = method_doc.get("operationId") or method_name.upper()
-            tree = _build_tree(method_doc, schemas, legacy_params, component_params, request_bodies)
+            route = (api_path, method_name.lower())
+            operation_id = method_doc.get("operationId")
+            if route in seen_routes or (operation_id and operation_id.lower() in seen_operations):
+                continue
+            seen_routes.add(route)
+            if operation_id:
+                seen_operations.add(operation_id.lower())
+
+            method_label = operation_id or method_name.upper()
+            tree = _build_tree(method_doc, resolver, ref_memo)
             output_data.append(
                 {
                     "apiPath": api_path,
@@ -1,61 +1,237 @@
-import requests
+import threading
+from functools import partial
+
 from requests import RequestException
 
+from utils.cache_manager import (
+    is_catalog_fresh,
+    load_service_cache,
+    store_services,
+    update_service_cache,
+)
+from utils.http_archive import http_get
+from utils.http_cache import cached_http_get
+from utils.result_cache import cached_extraction
 from utils.schema_parser import parse_schema_tree
+from utils.tracing import span
 
 DISCOVERY_URL = "https://discovery.googleapis.com/discovery/v1/apis"
 REQUEST_TIMEOUT = 30
+PRERELEASE_FLAGS = ("beta", "alpha", "preview")
 
+_directory_lock = threading.Lock()
+_directory_index = None
 
-def _fetch_json(url):
-    try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
+
+def _decode_json(url, response):
+    response.raise_for_status()
+    with span("json.decode", url=url) as phase:
+        phase.add(bytes=len(response.content))
         return response.json()
-    except RequestException as exc:
-        raise RuntimeError(f"Unable to download data from {url}: {exc}") from exc
-    except ValueError as exc:
-        raise RuntimeError(f"Received invalid JSON payload from {url}: {exc}") from exc
 
 
-def extract_gcp_service_apis(service):
+def _fetch_error(url, exc):
+    if isinstance(exc, RequestException):
+        return RuntimeError(f"Unable to download data from {url}: {exc}")
+    return RuntimeError(f"Received invalid JSON payload from {url}: {exc}")
+
+
+def _fetch_json(url, headers=None, allow_not_modified=False, cached=False):
+    try:
+        if cached:
+            response = cached_http_get(url, timeout=REQUEST_TIMEOUT)
+        else:
+            response = http_get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if allow_not_modified and response.status_code == 304:
+            return None, response
+        return _decode_json(url, response), response
+    except (RequestException, ValueError) as exc:
+        raise _fetch_error(url, exc) from exc
+
+
+async def _fetch_json_async(url):
+    from utils import async_http
+
+    try:
+        response = await async_http.get(url, timeout=REQUEST_TIMEOUT, cached=True)
+        return await async_http.run_blocking(_decode_json, url, response)
+    except (RequestException, ValueError) as exc:
+        raise _fetch_error(url, exc) from exc
+
+
+class DiscoveryIndex:
+    """Discovery directory entries keyed by lower-cased service name and version."""
+
+    __slots__ = ("_entries", "from_cache")
+
+    def __init__(self, items, from_cache=False):
+        self.from_cache = from_cache
+        self._entries = {}
+        for item in items:
+            name = item.get("name")
+            version = item.get("version")
+            if not name or not version:
+                continue
+            self._entries.setdefault(name.lower(), {})[version.lower()] = item
+
+    def services(self):
+        return sorted({entry["name"] for versions in self._entries.values() for entry in versions.values()})
+
+    def versions(self, service):
+        return sorted(entry["version"] for entry in self._entries.get(service.lower(), {}).values())
+
+    def entry(self, service, version=""):
+        candidates = self._entries.get(service.lower())
+        if not candidates:
+            return None
+        if version:
+            return candidates.get(version.lower())
+        preferred = [
+            entry for key, entry in candidates.items()
+            if not any(flag in key for flag in PRERELEASE_FLAGS)
+        ]
+        return preferred[0] if preferred else next(iter(candidates.values()))
+
+    def rest_url(self, service, version=""):
+        entry = self.entry(service, version)
+        return entry.get("discoveryRestUrl") if entry else None
+
+    def to_catalog(self):
+        """``{service: {version: discoveryRestUrl}}`` in directory order, as stored in the catalog cache."""
+        catalog = {}
+        for versions in self._entries.values():
+            for entry in versions.values():
+                catalog.setdefault(entry["name"], {})[entry["version"]] = entry.get("discoveryRestUrl")
+        return catalog
+
+    @classmethod
+    def from_catalog(cls, catalog, from_cache=True):
+        items = [
+            {"name": name, "version": version, "discoveryRestUrl": url}
+            for name, versions in catalog.items()
+            for version, url in versions.items()
+        ]
+        return cls(items, from_cache=from_cache)
+
+
+def _cached_discovery_index():
+    cache = load_service_cache()
+    apis = (cache.get("providers", {}).get("gcp") or {}).get("apis")
+    if apis and is_catalog_fresh(cache, "gcp"):
+        return DiscoveryIndex.from_catalog(apis)
+    return None
+
+
+def _fetch_discovery_index():
+    with span("catalog.discovery_index"):
+        return _fetch_discovery_index_uncached()
+
+
+def _fetch_discovery_index_uncached():
+    cached_entry = load_service_cache().get("providers", {}).get("gcp") or {}
+    headers = {}
+    if cached_entry.get("apis"):
+        if cached_entry.get("etag"):
+            headers["If-None-Match"] = cached_entry["etag"]
+        if cached_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cached_entry["last_modified"]
+
+    directory, response = _fetch_json(DISCOVERY_URL, headers=headers or None, allow_not_modified=bool(headers))
+    if directory is None:
+        index = DiscoveryIndex.from_catalog(cached_entry["apis"], from_cache=False)
+    else:
+        index = DiscoveryIndex(directory.get("items", []))
+
+    def record(cache):
+        entry = store_services(cache, "gcp", index.services())
+        entry["apis"] = index.to_catalog()
+        entry["etag"] = response.headers.get("ETag")
+        entry["last_modified"] = response.headers.get("Last-Modified")
+
+    try:
+        update_service_cache(record)
+    except OSError as exc:
+        print(f"⚠️ Unable to update the service catalog cache: {exc}")
+    return index
+
+
+def get_discovery_index(refresh=False):
+    """Returns the Discovery directory, from the catalog cache while it is fresh.
+
+    ``refresh`` forces a (conditional) live fetch unless this process already did one.
+    """
+    global _directory_index
+    index = _directory_index
+    if index is not None and not (refresh and index.from_cache):
+        return index
+    with _directory_lock:
+        index = _directory_index
+        if index is None or (refresh and index.from_cache):
+            index = (None if refresh else _cached_discovery_index()) or _fetch_discovery_index()
+            _directory_index = index
+        return index
+
+
+def _discovery_rest_url(service):
     if "@" in service:
         service_name, _, version = service.partition("@")
-        service_key = service_name.lower()
-        version_key = version.lower()
     else:
         service_name = service
         version = ""
-        service_key = service.lower()
-        version_key = ""
 
-    discovery_resp = _fetch_json(DISCOVERY_URL)
-    items = discovery_resp.get("items", [])
+    index = get_discovery_index()
+    if index.from_cache and not index.entry(service_name, version):
+        index = get_discovery_index(refresh=True)
+    if not index.versions(service_name):
+        raise RuntimeError(f"Service '{service_name}' not found in Google Discovery APIs.")
 
-    service_candidates = [
-        api for api in items if api.get("name", "").lower() == service_key
-    ]
+    service_entry = index.entry(service_name, version)
+    if not service_entry:
+        raise RuntimeError(f"Version '{version}' for service '{service_name}' was not found in Google Discovery APIs.")
 
-    if not service_candidates:
-        raise RuntimeError(f"Service '{service_name}' not found in Google Discovery APIs.")
+    return service_entry["discoveryRestUrl"]
+
+
+def resolve_gcp_spec(service):
+    """Downloads the Discovery document and returns ``(fingerprint, build)``."""
+    api_desc, _ = _fetch_json(_discovery_rest_url(service), cached=True)
+    return spec_fingerprint(api_desc), partial(build_gcp_operations, service, api_desc)
+
+
+def extract_gcp_service_apis(service):
+    return cached_extraction("gcp", service, *resolve_gcp_spec(service))
+
+
+async def resolve_gcp_spec_async(service):
+    """Async ``resolve_gcp_spec``: the download is awaited and JSON decoding runs on the loop's executor."""
+    from utils.async_http import run_blocking
+
+    api_desc_url = await run_blocking(_discovery_rest_url, service)
+    api_desc = await _fetch_json_async(api_desc_url)
+    return spec_fingerprint(api_desc), partial(build_gcp_operations, service, api_desc)
+
+
+async def extract_gcp_service_apis_async(service, executor=None):
+    """Async ``extract_gcp_service_apis``; the result cache and tree building run on ``executor``.
+
+    ``executor`` defaults to the loop's thread pool; pass a ``ProcessPoolExecutor``
+    to build trees on other cores.
+    """
+    from utils.async_http import run_blocking
+
+    fingerprint, build = await resolve_gcp_spec_async(service)
+    return await run_blocking(cached_extraction, "gcp", service, fingerprint, build, executor=executor)
+
+
+def spec_fingerprint(api_desc):
+    revision = api_desc.get("revision")
+    etag = api_desc.get("etag")
+    if not (revision or etag):
+        return None
+    return f"{api_desc.get('id') or api_desc.get('name')}:{revision}:{etag}"
 
-    service_entry = None
-    if version_key:
-        service_entry = next(
-            (api for api in service_candidates if api.get("version", "").lower() == version_key),
-            None,
-        )
-        if not service_entry:
-            raise RuntimeError(f"Version '{version}' for service '{service_name}' was not found in Google Discovery APIs.")
-    else:
-        preferred = [
-            api for api in service_candidates
-            if not any(flag in (api.get("version", "").lower()) for flag in ("beta", "alpha", "preview"))
-        ]
-        service_entry = preferred[0] if preferred else service_candidates[0]
 
-    api_desc_url = service_entry["discoveryRestUrl"]
-    api_desc = _fetch_json(api_desc_url)
+def build_gcp_operations(service, api_desc):
     schemas = api_desc.get("schemas", {}) or {}
 
     base_url = api_desc.get("baseUrl")
@@ -65,14 +241,14 @@ def extract_gcp_service_apis(service):
         base_url = f"{root_url}{service_path}"
 
     output_data = []
+    ref_memo = {}
 
     def build_tree(method):
         request_info = method.get("request", {})
         schema_ref = request_info.get("$ref")
         if schema_ref and schema_ref in schemas:
-            schema = schemas.get(schema_ref, {})
-            if schema:
-                return parse_schema_tree(schema, schemas)
+            if schemas.get(schema_ref):
+                return parse_schema_tree(request_info, schemas, memo=ref_memo)
         return []
 
     def build_full_url(path):
@@ -105,7 +281,9 @@ def extract_gcp_service_apis(service):
             if child_resources:
                 traverse_resources(full_name, child_resources)
 
-    append_methods(service, api_desc.get("methods", {}))
-    traverse_resources("", api_desc.get("resources", {}))
+    with span("gcp.build_tree", service=service) as phase:
+        append_methods(service, api_desc.get("methods", {}))
+        traverse_resources("", api_desc.get("resources", {}))
+        phase.add(operations=len(output_data), rows=sum(len(item["tree"]) for item in output_data), refs=len(ref_memo))
 
     return output_data
@@ -1,10 +1,27 @@
-import botocore.session
-import requests
+import argparse
+import importlib
+import itertools
+import os
+import sys
+import threading
 from pathlib import Path
 
 from utils.cache_manager import (
+    cached_services,
+    catalog_age,
+    is_catalog_fresh,
     load_service_cache,
-    save_service_cache,
+    store_services,
+    update_service_cache,
+)
+from utils.tracing import enable_tracing, span, tracing_enabled
+from writer import (
+    DEFAULT_SHARD_ROWS,
+    OUTPUT_FORMATS,
+    format_label,
+    missing_dependency,
+    output_extension,
+    write_output,
 )
 GCP_SERVICES = [
     "acceleratedmobilepageurl",
@@ -524,8 +541,9 @@ AZURE_SERVICES = [
     "webpubsub"
 ]
 
-GCP_DISCOVERY_URL = "https://discovery.googleapis.com/discovery/v1/apis"
 AZURE_SPEC_ROOT = "https://api.github.com/repos/Azure/azure-rest-api-specs/contents/specification"
+# How long the end of a run waits for a background catalog refresh that is still in flight.
+CATALOG_REFRESH_JOIN_TIMEOUT = 5.0
 
 PROVIDER_DEFAULTS = {
     "gcp": GCP_SERVICES,
@@ -534,51 +552,218 @@ PROVIDER_DEFAULTS = {
 }
 
 
+# Provider modules pull in botocore/requests, so they are only imported once a provider is chosen.
+EXTRACTOR_MAP = {
+    "gcp": ("extractors.gcp_extractor", "extract_gcp_service_apis"),
+    "aws": ("extractors.aws_extractor", "extract_aws_service_apis"),
+    "azure": ("extractors.azure_extractor", "extract_azure_service_apis"),
+}
+
+
+SPEC_RESOLVER_MAP = {
+    "gcp": ("extractors.gcp_extractor", "resolve_gcp_spec"),
+    "aws": ("extractors.aws_extractor", "resolve_aws_spec"),
+    "azure": ("extractors.azure_extractor", "resolve_azure_spec"),
+}
+
+class _Unchanged:
+    __slots__ = ()
+
+    def __reduce__(self):
+        # Unpickles as this module's singleton, so ``is UNCHANGED`` holds for results from worker processes.
+        return "UNCHANGED"
+
+
+# Returned by ``_extract_service`` in place of operations when the spec matches the previous run.
+UNCHANGED = _Unchanged()
+
+
+def _load_provider_function(targets, provider):
+    target = targets.get(provider)
+    if target is None:
+        return None
+    module_name, function_name = target
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def get_extractor(provider):
+    return _load_provider_function(EXTRACTOR_MAP, provider)
+
+
+def get_spec_resolver(provider):
+    return _load_provider_function(SPEC_RESOLVER_MAP, provider)
+
+
+def _fetch_provider_catalog(provider):
+    """Returns ``(services, entry_fields)``; the fields are stored alongside the list in the catalog cache."""
+    if provider == "aws":
+        import botocore
+
+        from extractors.aws_extractor import list_aws_services
+
+        return list_aws_services(), {"botocore_version": botocore.__version__}
+    if provider == "gcp":
+        from extractors.gcp_extractor import get_discovery_index
+
+        # The extractor stores the per-service versions, URLs and validators itself.
+        return get_discovery_index(refresh=True).services(), {}
+    if provider == "azure":
+        from utils.http_archive import http_get
+
+        cached_entry = load_service_cache().get("providers", {}).get("azure") or {}
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if cached_entry.get("services") and cached_entry.get("etag"):
+            # GitHub doesn't count 304 responses against the API rate limit.
+            headers["If-None-Match"] = cached_entry["etag"]
+        resp = http_get(AZURE_SPEC_ROOT, headers=headers, timeout=20)
+        if resp.status_code == 304:
+            return list(cached_entry["services"]), {}
+        resp.raise_for_status()
+        entries = resp.json()
+        services = sorted({entry.get("name") for entry in entries if entry.get("type") == "dir"})
+        return services, {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    return [], {}
+
+
 def fetch_provider_services(provider):
     try:
-        if provider == "aws":
-            session = botocore.session.get_session()
-            return sorted(session.get_available_services())
-        if provider == "gcp":
-            resp = requests.get(GCP_DISCOVERY_URL, timeout=20)
-            resp.raise_for_status()
-            items = resp.json().get("items", [])
-            return sorted({item.get("name") for item in items if item.get("name")})
-        if provider == "azure":
-            headers = {"Accept": "application/vnd.github.v3+json"}
-            resp = requests.get(AZURE_SPEC_ROOT, headers=headers, timeout=20)
-            resp.raise_for_status()
-            entries = resp.json()
-            return sorted({entry.get("name") for entry in entries if entry.get("type") == "dir"})
+        return _fetch_provider_catalog(provider)
     except Exception as exc:
         print(f"⚠️ Could not refresh {provider.upper()} services automatically: {exc}")
-    return []
+    return [], {}
+
+
+def _merge_refreshed_services(provider, service_cache, refreshed, entry_fields, previous):
+    refreshed_clean = sorted({svc for svc in refreshed if svc})
+    prev_set = {svc.lower() for svc in previous}
+    refreshed_set = {svc.lower() for svc in refreshed_clean}
+    messages = []
+    if previous and prev_set == refreshed_set:
+        messages.append(f"ℹ️ List of {provider.upper()} services are up to date.")
+    else:
+        added = sorted(refreshed_set - prev_set)
+        removed = sorted(prev_set - refreshed_set)
+        if added:
+            messages.append(f"ℹ️ Added {len(added)} new {provider.upper()} services from live catalog.")
+        elif not previous:
+            messages.append(f"ℹ️ Retrieved {len(refreshed_clean)} {provider.upper()} services from live catalog.")
+        if removed:
+            messages.append(f"ℹ️ {len(removed)} {provider.upper()} services were removed from the live catalog.")
+    store_services(service_cache, provider, refreshed_clean).update(entry_fields)
+    return refreshed_clean, messages
+
+
+def _persist_refreshed_services(provider, refreshed, entry_fields, previous):
+    """Merges a refreshed catalog into the on-disk cache and returns messages describing what changed since ``previous``."""
+    outcome = {"messages": []}
+
+    def merge(service_cache):
+        _, outcome["messages"] = _merge_refreshed_services(provider, service_cache, refreshed, entry_fields, previous)
+
+    try:
+        update_service_cache(merge)
+    except OSError as exc:
+        print(f"⚠️ Unable to update the service catalog cache: {exc}")
+    return outcome["messages"]
+
+
+def _is_catalog_fresh(provider, service_cache):
+    if not is_catalog_fresh(service_cache, provider):
+        return False
+    if provider == "aws":
+        import botocore
+
+        entry = service_cache.get("providers", {}).get("aws") or {}
+        return entry.get("botocore_version") in (None, botocore.__version__)
+    return True
+
+
+def _format_age(seconds):
+    if seconds < 60:
+        return "just now"
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit} ago"
+
+
+_background_refreshes = []
+
+
+class BackgroundCatalogRefresh:
+    """Refreshes one provider's catalog on a daemon thread and persists it when it arrives.
+
+    Nothing is printed from the thread so prompts stay intact; outcomes are
+    reported by ``finish`` once the run is over.
+    """
+
+    def __init__(self, provider, previous):
+        self.provider = provider
+        self.previous = previous
+        self.messages = []
+        self.error = None
+        self._thread = threading.Thread(target=self._run, name=f"{provider}-catalog-refresh", daemon=True)
+
+    def start(self):
+        _background_refreshes.append(self)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            refreshed, entry_fields = _fetch_provider_catalog(self.provider)
+            if not refreshed:
+                self.error = "the live catalog was empty"
+                return
+            messages = _persist_refreshed_services(self.provider, refreshed, entry_fields, self.previous)
+            self.messages = [message for message in messages if "up to date" not in message]
+        except Exception as exc:
+            self.error = exc
+
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def finish(self, timeout=CATALOG_REFRESH_JOIN_TIMEOUT):
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"ℹ️ Background refresh of the {self.provider.upper()} services list is still running; it will be retried next run.")
+            return
+        if self.error:
+            print(f"⚠️ Background refresh of the {self.provider.upper()} services list failed: {self.error}")
+        for message in self.messages:
+            print(message)
+
 
+def finish_background_refreshes(timeout=CATALOG_REFRESH_JOIN_TIMEOUT):
+    while _background_refreshes:
+        _background_refreshes.pop(0).finish(timeout)
 
-def get_service_list(provider, service_cache):
+
+def get_service_list(provider, service_cache, background=False, force=False):
+    """Returns ``(services, pending_refresh)``.
+
+    A catalog younger than its TTL is used as-is. A stale one is used
+    immediately and, when ``background`` is set, refreshed on a background
+    thread (``pending_refresh``); otherwise it is refreshed synchronously.
+    Refreshed lists are merged into the on-disk cache.
+    """
     defaults = PROVIDER_DEFAULTS.get(provider, [])
-    previous = service_cache.get(provider, [])
-    refreshed = fetch_provider_services(provider)
-    cache_dirty = False
+    previous = cached_services(service_cache, provider)
+
+    if previous and not force:
+        if _is_catalog_fresh(provider, service_cache):
+            age = _format_age(catalog_age(service_cache, provider))
+            print(f"ℹ️ Using cached {provider.upper()} services list (refreshed {age}).")
+            return sorted(previous), None
+        if background:
+            print(f"ℹ️ Using cached {provider.upper()} services list; refreshing it in the background.")
+            return sorted(previous), BackgroundCatalogRefresh(provider, previous).start()
+
+    refreshed, entry_fields = fetch_provider_services(provider)
 
     if refreshed:
-        refreshed_clean = sorted({svc for svc in refreshed if svc})
-        prev_set = {svc.lower() for svc in previous}
-        refreshed_set = {svc.lower() for svc in refreshed_clean}
-        if previous and prev_set == refreshed_set:
-            print(f"ℹ️ List of {provider.upper()} services are up to date.")
-        else:
-            added = sorted(refreshed_set - prev_set)
-            removed = sorted(prev_set - refreshed_set)
-            if added:
-                print(f"ℹ️ Added {len(added)} new {provider.upper()} services from live catalog.")
-            elif not previous:
-                print(f"ℹ️ Retrieved {len(refreshed_clean)} {provider.upper()} services from live catalog.")
-            if removed:
-                print(f"ℹ️ {len(removed)} {provider.upper()} services were removed from the live catalog.")
-        service_cache[provider] = refreshed_clean
-        cache_dirty = True
-        active_list = refreshed_clean
+        for message in _persist_refreshed_services(provider, refreshed, entry_fields, previous):
+            print(message)
+        active_list = sorted({svc for svc in refreshed if svc})
     else:
         if previous:
             print(f"⚠️ Using cached {provider.upper()} services list; live refresh unavailable.")
@@ -590,7 +775,7 @@ def get_service_list(provider, service_cache):
             print(f"⚠️ No known services for provider '{provider}'.")
             active_list = []
 
-    return sorted(active_list), cache_dirty
+    return sorted(active_list), None
 
 
 def format_service_table(services, columns=4):
@@ -602,16 +787,6 @@ def format_service_table(services, columns=4):
         row = services[idx: idx + columns]
         rows.append("".join(name.ljust(col_width) for name in row))
     return "\n".join(rows)
-from extractors.gcp_extractor import extract_gcp_service_apis
-from extractors.aws_extractor import extract_aws_service_apis
-from extractors.azure_extractor import extract_azure_service_apis
-from writer.excel_writer import write_to_excel
-
-EXTRACTOR_MAP = {
-    "gcp": extract_gcp_service_apis,
-    "aws": extract_aws_service_apis,
-    "azure": extract_azure_service_apis,
-}
 
 
 def prompt_for_related_aws_variants(selected_service, available_services, auto_accept_all=False):
@@ -658,16 +833,13 @@ def prompt_for_related_aws_variants(selected_service, available_services, auto_a
 
 def fetch_gcp_service_versions(service):
     try:
-        resp = requests.get(GCP_DISCOVERY_URL, timeout=20)
-        resp.raise_for_status()
-        items = resp.json().get("items", [])
+        from extractors.gcp_extractor import get_discovery_index
+
+        return get_discovery_index().versions(service)
     except Exception as exc:
         print(f"⚠️ Could not retrieve GCP versions for '{service}': {exc}")
         return []
 
-    versions = sorted({item.get("version") for item in items if item.get("name", "").lower() == service.lower() and item.get("version")})
-    return versions
-
 
 def prompt_for_gcp_versions(service):
     versions = fetch_gcp_service_versions(service)
@@ -719,8 +891,693 @@ def prompt_for_gcp_versions(service):
         return [(f"{service}@{ver}", f"{service} ({ver})") for ver in chosen]
 
 
-def main():
-    print("📡 Extracting CSP APIs and writing to Excel...")
+def default_output_filename(provider, service, output_format="xlsx"):
+    safe_service_name = "".join(ch if ch.isalnum() else "-" for ch in service).strip("-") or f"{provider}-service"
+    safe_service_name = "-".join(filter(None, safe_service_name.split("-")))
+    return f"{provider}-{safe_service_name.lower()}-api-extract{output_extension(output_format)}"
+
+
+def _extract_service(provider, service, compact=False, previous=None):
+    """Returns ``(service, tree_data, error, fingerprint)``.
+
+    ``previous`` is the manifest entry of the last run; when its fingerprint
+    still matches the spec nothing is parsed and ``tree_data`` is ``UNCHANGED``.
+    """
+    from utils.output_manifest import is_unchanged
+    from utils.result_cache import cached_extraction
+
+    try:
+        with span("extract", service=service, variant=service) as phase:
+            fingerprint, build = get_spec_resolver(provider)(service)
+            if is_unchanged(previous, fingerprint):
+                phase.set(unchanged=True)
+                return service, UNCHANGED, None, fingerprint
+            tree_data = cached_extraction(provider, service, fingerprint, build)
+            phase.add(**_extraction_counters(tree_data))
+        if compact and tree_data:
+            from utils.compact_tree import compact_records
+
+            tree_data = compact_records(tree_data)
+        return service, tree_data, None, fingerprint
+    except RuntimeError as exc:
+        return service, None, str(exc), None
+    except Exception as exc:
+        message = f"Unexpected error while extracting {provider.upper()} APIs for '{service}': {exc}"
+        return service, None, message, None
+
+
+def _extraction_counters(tree_data):
+    tree_data = tree_data or ()
+    return {"operations": len(tree_data), "rows": sum(len(item.get("tree") or ()) for item in tree_data)}
+
+
+def index_records(provider, service, records, param_db):
+    """Stores ``records`` in the SQLite parameter store; ``param_db`` of ``""`` means the default path."""
+    import sqlite3
+
+    from utils.param_store import store_records
+
+    try:
+        store_records(provider, service, records, param_db or None)
+    except (OSError, sqlite3.Error, RuntimeError) as exc:
+        print(f"⚠️ Unable to index parameters for '{service}': {exc}")
+
+
+def _indexed_services(provider, param_db):
+    import sqlite3
+
+    from utils.param_store import indexed_services
+
+    try:
+        return indexed_services(provider, param_db or None)
+    except (OSError, sqlite3.Error, RuntimeError):
+        return set()
+
+
+def _extract_service_to_workbook(
+    provider,
+    service,
+    output_path,
+    streaming=False,
+    output_format="xlsx",
+    param_db=None,
+    previous=None,
+    options=None,
+):
+    """Returns ``(service, operations, error, manifest entry, written)``.
+
+    With ``previous`` set, the output is left alone when the spec fingerprint
+    or the extracted content is the same as in the last run. ``options`` are
+    the output options recorded in the manifest entry.
+    """
+    from utils.output_manifest import manifest_entry
+
+    service, tree_data, error, fingerprint = _extract_service(provider, service, previous=previous)
+    if tree_data is UNCHANGED:
+        return service, previous.get("operations", 0), None, previous, False
+    if error or not tree_data:
+        return service, 0, error, None, False
+    if param_db is not None:
+        index_records(provider, service, tree_data, param_db)
+    entry = manifest_entry(fingerprint, tree_data, options)
+    if previous and previous.get("content_hash") == entry["content_hash"]:
+        return service, len(tree_data), None, entry, False
+    run = {"key": service, "label": service, "data": tree_data}
+    try:
+        with span("write", service=service, format=output_format):
+            write_output([run], output_path, provider, output_format, streaming=streaming)
+    except OSError as exc:
+        return service, 0, f"Failed to write output file '{output_path}': {exc}", None, False
+    except RuntimeError as exc:
+        return service, 0, str(exc), None, False
+    return service, len(tree_data), None, entry, True
+
+
+def iter_variant_runs(provider, service_variants, jobs, compact=False, param_db=None):
+    """Extracts ``(service, label)`` variants on up to ``jobs`` processes, yielding runs in prompt order.
+
+    A run is yielded as soon as it and every variant before it have finished, so
+    the caller can write its sheet while later variants are still extracting and
+    drop it afterwards. Failed and empty variants are reported and skipped.
+    """
+    labels = {actual: display or actual for actual, display in service_variants}
+    order = list(labels)
+    finished = {}
+    position = 0
+    job_args = [(provider, service, compact) for service in order]
+    mp_context = None
+    if jobs > 1 and any(refresh.is_running() for refresh in _background_refreshes):
+        import multiprocessing
+
+        # A forked worker could inherit a lock held by the catalog refresh thread.
+        mp_context = multiprocessing.get_context("spawn")
+    results = _run_batch_jobs(_extract_service, job_args, jobs, mp_context)
+    try:
+        for service, tree_data, error, _ in results:
+            if error:
+                print(f"❌ {error}")
+            elif not tree_data:
+                print(f"⚠️ No API methods were returned for '{service}'.")
+            elif param_db is not None:
+                index_records(provider, service, tree_data, param_db)
+            finished[service] = None if error else tree_data
+
+            while position < len(order) and order[position] in finished:
+                ready = order[position]
+                data = finished.pop(ready)
+                position += 1
+                if data:
+                    yield {"key": ready, "label": labels[ready], "data": data}
+    finally:
+        # Closing early (say, the writer failed) cancels the variants that have not started.
+        results.close()
+
+
+def _run_batch_jobs(worker, job_args, jobs, mp_context=None):
+    if jobs <= 1:
+        for args in job_args:
+            yield worker(*args)
+        return
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    traced = tracing_enabled()
+    if traced:
+        from utils.tracing import call_traced, merge_events
+
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=mp_context)
+    try:
+        if traced:
+            futures = [executor.submit(call_traced, worker, *args) for args in job_args]
+        else:
+            futures = [executor.submit(worker, *args) for args in job_args]
+        for future in as_completed(futures):
+            if traced:
+                result, events = future.result()
+                merge_events(events)
+                yield result
+            else:
+                yield future.result()
+    finally:
+        # When the consumer stops early, don't wait for jobs that have not started.
+        executor.shutdown(cancel_futures=True)
+
+
+def _same_content(previous, entries, options):
+    """True when a combined output written from ``previous`` holds the same operations as ``entries``."""
+    from utils.output_manifest import is_current
+
+    if not previous or previous.keys() != entries.keys():
+        return False
+    return all(
+        is_current(old, options) and old.get("content_hash") == entries[service]["content_hash"]
+        for service, old in previous.items()
+    )
+
+
+def _reload_unchanged(provider, service, entry, compact, options):
+    """Returns ``(records, entry, error)`` for a service skipped as unchanged, when the output must be rewritten.
+
+    The records come from the result cache, or are extracted again when the cache no longer has them.
+    """
+    from utils.output_manifest import manifest_entry
+    from utils.result_cache import load_cached_result
+
+    records = load_cached_result(provider, service, entry.get("fingerprint"))
+    if records is None:
+        service, records, error, fingerprint = _extract_service(provider, service, compact)
+        if error or not records:
+            return None, None, error or f"No API methods were returned for '{service}'."
+        return records, manifest_entry(fingerprint, records, options), None
+    if compact:
+        from utils.compact_tree import compact_records
+
+        records = compact_records(records)
+    return records, entry, None
+
+
+def run_batch(
+    provider,
+    output_dir,
+    jobs,
+    combined_file=None,
+    streaming=False,
+    compact=False,
+    refresh_catalog=False,
+    output_format="xlsx",
+    param_db=None,
+    incremental=False,
+    shard_rows=None,
+):
+    from utils.output_manifest import is_current, load_manifest, manifest_entry, update_manifest
+
+    service_cache = load_service_cache()
+    with span("catalog.refresh", provider=provider):
+        services, _ = get_service_list(provider, service_cache, force=refresh_catalog)
+    if not services:
+        print(f"❌ No {provider.upper()} services available for batch extraction.")
+        return 1
+
+    jobs = max(1, min(jobs, len(services)))
+    print(f"📡 Extracting {len(services)} {provider.upper()} services with {jobs} worker(s)...")
+
+    succeeded = {}
+    failed = {}
+    empty = []
+    unchanged = []
+    variant_runs = {}
+    manifest_dir = combined_file.parent if combined_file else output_dir
+    manifest = load_manifest(manifest_dir)
+    manifest_updates = {}
+    output_options = {
+        "format": output_format,
+        "streaming": streaming,
+        "compact": compact,
+        "shard_rows": shard_rows,
+    }
+    indexed = _indexed_services(provider, param_db) if incremental and param_db is not None else None
+
+    def previous_entry(path, service):
+        if not incremental or not path.exists():
+            return None
+        previous = manifest.get(path.name, {}).get(service)
+        if not is_current(previous, output_options):
+            return None
+        if indexed is not None and service not in indexed:
+            # Re-extract so the service gets indexed; the content hash still spares the rewrite.
+            return dict(previous, fingerprint=None)
+        return previous
+
+    if combined_file:
+        job_args = [(provider, service, compact, previous_entry(combined_file, service)) for service in services]
+        results = _run_batch_jobs(_extract_service, job_args, jobs)
+    else:
+        output_paths = {
+            service: output_dir / default_output_filename(provider, service, output_format)
+            for service in services
+        }
+        job_args = [
+            (
+                provider,
+                service,
+                str(output_paths[service]),
+                streaming,
+                output_format,
+                param_db,
+                previous_entry(output_paths[service], service),
+                output_options,
+            )
+            for service in services
+        ]
+        results = _run_batch_jobs(_extract_service_to_workbook, job_args, jobs)
+
+    combined_entries = {}
+    for result in results:
+        service, outcome, error = result[:3]
+        if error:
+            failed[service] = error
+            print(f"❌ {service}: {error}")
+        elif outcome is UNCHANGED:
+            # Spec unchanged since the last combined run: records are only loaded if the file is rewritten.
+            entry = manifest[combined_file.name][service]
+            succeeded[service] = entry.get("operations", 0)
+            variant_runs[service] = None
+            combined_entries[service] = entry
+            unchanged.append(service)
+            print(f"⏭️ {service}: unchanged")
+        elif not outcome:
+            empty.append(service)
+            print(f"⚠️ {service}: no API methods were returned.")
+        elif combined_file:
+            succeeded[service] = len(outcome)
+            variant_runs[service] = {"key": service, "label": service, "data": outcome}
+            combined_entries[service] = manifest_entry(result[3], outcome, output_options)
+            if param_db is not None:
+                index_records(provider, service, outcome, param_db)
+            print(f"✅ {service}: {len(outcome)} operations")
+        else:
+            _, _, _, entry, written = result
+            succeeded[service] = outcome
+            manifest_updates[output_paths[service].name] = {service: entry}
+            if written:
+                print(f"✅ {service}: {outcome} operations")
+            else:
+                unchanged.append(service)
+                print(f"⏭️ {service}: unchanged, kept existing output")
+
+    if combined_file and variant_runs:
+        previous = manifest.get(combined_file.name) if incremental and combined_file.exists() else None
+        if _same_content(previous, combined_entries, output_options):
+            skipped = set(unchanged)
+            unchanged.extend(service for service in combined_entries if service not in skipped)
+            print(f"⏭️ Combined output unchanged, kept: {combined_file}")
+        else:
+            for service in [service for service, run in variant_runs.items() if run is None]:
+                records, entry, error = _reload_unchanged(
+                    provider, service, combined_entries[service], compact, output_options
+                )
+                if error:
+                    failed[service] = error
+                    del succeeded[service], variant_runs[service], combined_entries[service]
+                    print(f"❌ {service}: {error}")
+                    continue
+                variant_runs[service] = {"key": service, "label": service, "data": records}
+                combined_entries[service] = entry
+            ordered_runs = [variant_runs[service] for service in services if service in variant_runs]
+            try:
+                with span("write", service="(combined)", format=output_format):
+                    shard_paths = write_output(
+                        ordered_runs,
+                        str(combined_file),
+                        provider,
+                        output_format,
+                        streaming=streaming,
+                        shard_rows=shard_rows,
+                        jobs=jobs,
+                    )
+            except PermissionError:
+                print(f"❌ Unable to write to '{combined_file}'. Close the file if it's open and try again.")
+                return 1
+            except OSError as exc:
+                print(f"❌ Failed to write output file '{combined_file}': {exc}")
+                return 1
+            except RuntimeError as exc:
+                print(f"❌ {exc}")
+                return 1
+            print(f"✅ Combined output saved to: {combined_file}")
+            if shard_rows:
+                _print_shards(shard_paths)
+        manifest_updates[combined_file.name] = combined_entries
+
+    if manifest_updates:
+        try:
+            update_manifest(manifest_dir, manifest_updates)
+        except OSError as exc:
+            print(f"⚠️ Unable to update the output manifest in '{manifest_dir}': {exc}")
+
+    print(
+        f"\n📊 Batch summary for {provider.upper()}: {len(succeeded)} succeeded, "
+        f"{len(failed)} failed, {len(empty)} without methods (of {len(services)} services)."
+        + (f" {len(unchanged)} unchanged." if incremental else "")
+    )
+    if failed:
+        print("Failed services:")
+        for service in sorted(failed):
+            print(f"  - {service}: {failed[service]}")
+    if not combined_file and succeeded:
+        print(f"Output files saved under: {output_dir}")
+    return 1 if failed and not succeeded else 0
+
+
+def _print_shards(shard_paths):
+    if shard_paths:
+        print(f"🧩 {len(shard_paths)} shard workbook(s) in: {Path(shard_paths[0]).parent}")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Extract CSP API parameters into Excel workbooks. Runs interactively unless --all is given."
+    )
+    parser.add_argument("--provider", choices=sorted(PROVIDER_DEFAULTS), help="Cloud provider to extract.")
+    parser.add_argument(
+        "--all",
+        dest="all_services",
+        action="store_true",
+        help="Non-interactive batch mode: extract every service in the provider catalog.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes for batch mode and --sharded output (default: CPU count).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        help="Directory for batch-mode workbooks (default: OUTPUT_FILES/).",
+    )
+    parser.add_argument(
+        "--combined",
+        metavar="FILE",
+        help="In batch mode, write every service into this single workbook instead of one workbook per service.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        default="xlsx",
+        help=(
+            "Output format (default: xlsx). csv, jsonl and parquet write one row per parameter with "
+            "provider/variant/resource/method/api_path/level columns; parquet requires pyarrow."
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "In batch mode, only re-extract and rewrite outputs whose spec fingerprint or content changed "
+            "since the last run (tracked in .extract-manifest.json next to the outputs)."
+        ),
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Write workbooks in openpyxl write-only mode so memory stays flat for very large outputs.",
+    )
+    parser.add_argument(
+        "--sharded",
+        dest="shard_rows",
+        nargs="?",
+        type=int,
+        const=DEFAULT_SHARD_ROWS,
+        metavar="ROWS",
+        help=(
+            "Split xlsx output into shard workbooks of at most ROWS rows "
+            f"(default: {DEFAULT_SHARD_ROWS:,}), written in parallel by --jobs processes, and write an "
+            "index workbook linking them. Sheets are split before Excel's row limit."
+        ),
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Hold extracted operations in a compact columnar form (slotted records, interned labels) to cut memory use.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not update the on-disk extraction result cache (.extract_cache/).",
+    )
+    parser.add_argument(
+        "--refresh-catalog",
+        action="store_true",
+        help="Refresh the provider service catalog now, even if the cached copy is still fresh.",
+    )
+    parser.add_argument(
+        "--index",
+        dest="param_db",
+        nargs="?",
+        const="",
+        metavar="DB",
+        help=(
+            "Also store every extracted parameter in a SQLite database for 'query' "
+            "(default: api_params.db, or CSP_PARAM_DB)."
+        ),
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        type=Path,
+        help=(
+            "Time every phase (catalog refresh, downloads, JSON decoding, tree building, writing) and "
+            "export a Chrome trace-event JSON file; a per-phase summary is printed at the end."
+        ),
+    )
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        "--http-record",
+        metavar="DIR",
+        type=Path,
+        help="Store every HTTP response fetched during this run in a content-addressed archive at DIR.",
+    )
+    archive.add_argument(
+        "--http-replay",
+        metavar="DIR",
+        type=Path,
+        help="Serve every HTTP request from the archive at DIR (recorded with --http-record); no network access.",
+    )
+    return parser
+
+
+def build_query_parser():
+    parser = argparse.ArgumentParser(
+        prog="fetch_api_params.py query",
+        description="Search parameters stored with --index across every provider.",
+    )
+    parser.add_argument("term", help="Parameter name (or part of one) to look for, e.g. 'kms'.")
+    parser.add_argument("--provider", choices=sorted(PROVIDER_DEFAULTS), help="Only search this provider.")
+    parser.add_argument("--exact", action="store_true", help="Match the whole parameter name (case-insensitive).")
+    parser.add_argument("--required", action="store_true", help="Only show required parameters.")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of matches to show (default: 50).")
+    parser.add_argument("--db", help="Parameter database to search (default: api_params.db, or CSP_PARAM_DB).")
+    return parser
+
+
+def run_query(args):
+    import sqlite3
+
+    from utils.param_store import default_db_path, search_params
+
+    db_path = Path(args.db) if args.db else default_db_path()
+    if not db_path.is_file():
+        print(f"❌ Parameter database '{db_path}' does not exist. Extract with --index first.")
+        return 1
+    try:
+        rows = search_params(
+            args.term,
+            provider=args.provider,
+            exact=args.exact,
+            required_only=args.required,
+            limit=args.limit,
+            path=db_path,
+        )
+    except (sqlite3.Error, RuntimeError) as exc:
+        print(f"❌ Unable to search '{db_path}': {exc}")
+        return 1
+    if not rows:
+        print(f"No parameters matching '{args.term}'.")
+        return 0
+    for provider, service, version, resource, method, _, parent, name, param_type, required in rows:
+        service_label = f"{service}@{version}" if version else service
+        target = method if resource == service else f"{resource}.{method}"
+        param = f"{parent}.{name}" if parent else name
+        details = ", ".join(filter(None, [param_type, "required" if required else None]))
+        print(f"{provider:<6} {service_label} {target}: {param}" + (f" ({details})" if details else ""))
+    if len(rows) == args.limit:
+        print(f"... showing the first {args.limit} matches; use --limit to see more.")
+    return 0
+
+
+def build_diff_parser():
+    parser = argparse.ArgumentParser(
+        prog="fetch_api_params.py diff",
+        description=(
+            "Compare two extraction exports (written with --format jsonl, csv or parquet), "
+            "e.g. from two botocore versions or two GCP Discovery revisions."
+        ),
+    )
+    parser.add_argument("old", type=Path, help="Export of the older spec revision.")
+    parser.add_argument("new", type=Path, help="Export of the newer spec revision.")
+    parser.add_argument("--json", metavar="FILE", help="Write the full JSON report to FILE ('-' for stdout).")
+    parser.add_argument("--xlsx", metavar="FILE", type=Path, help="Write the changes as an Excel workbook.")
+    variants = parser.add_mutually_exclusive_group()
+    variants.add_argument(
+        "--ignore-variants",
+        dest="ignore_variants",
+        action="store_const",
+        const=True,
+        help="Match operations on resource and method only, e.g. to compare two GCP versions "
+        "(the default when each export holds a single variant).",
+    )
+    variants.add_argument(
+        "--match-variants",
+        dest="ignore_variants",
+        action="store_const",
+        const=False,
+        help="Only compare operations of the same variant, even for single-variant exports.",
+    )
+    return parser
+
+
+def run_diff(args):
+    import json
+
+    from utils.api_diff import diff_exports
+
+    for path in (args.old, args.new):
+        if not path.is_file():
+            print(f"❌ Export '{path}' does not exist.")
+            return 1
+    try:
+        report = diff_exports(args.old, args.new, ignore_variants=args.ignore_variants)
+    except (OSError, RuntimeError) as exc:
+        print(f"❌ {exc}")
+        return 1
+
+    if args.json == "-":
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return 0
+
+    summary = report["summary"]
+    variants = report["variants"]
+    if not variants["matched"] and variants["old"] != variants["new"]:
+        print(
+            f"ℹ️ Matching operations by resource and method across variants "
+            f"{', '.join(variants['old']) or '-'} → {', '.join(variants['new']) or '-'}."
+        )
+    print(
+        f"📊 {args.old.name} → {args.new.name}: {summary['added_operations']} added, "
+        f"{summary['removed_operations']} removed, {summary['changed_operations']} changed, "
+        f"{summary['unchanged_operations']} unchanged operations."
+    )
+    try:
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"✅ JSON report saved to: {args.json}")
+        if args.xlsx:
+            from writer.diff_writer import write_diff_workbook
+
+            write_diff_workbook(report, str(args.xlsx), str(args.old), str(args.new))
+            print(f"✅ Diff workbook saved to: {args.xlsx}")
+    except OSError as exc:
+        print(f"❌ Failed to write diff report: {exc}")
+        return 1
+    return 0
+
+
+SUBCOMMANDS = {
+    "query": (build_query_parser, run_query),
+    "diff": (build_diff_parser, run_diff),
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in SUBCOMMANDS:
+        build_parser, run = SUBCOMMANDS[argv[0]]
+        return run(build_parser().parse_args(argv[1:]))
+    args = build_arg_parser().parse_args(argv)
+    if args.trace:
+        enable_tracing()
+    exit_code = _run(args)
+    finish_background_refreshes()
+    if args.trace:
+        _write_trace(args.trace)
+    return exit_code
+
+
+def _write_trace(path):
+    from utils.tracing import export_trace, print_summary
+
+    print_summary()
+    try:
+        export_trace(path)
+    except OSError as exc:
+        print(f"⚠️ Unable to write trace '{path}': {exc}")
+        return
+    print(f"🧭 Trace written to {path} (open it in chrome://tracing or https://ui.perfetto.dev).")
+
+
+def _run(args):
+    if args.all_services and not args.provider:
+        print("❌ --all requires --provider.")
+        return 2
+    package = missing_dependency(args.output_format)
+    if package:
+        print(f"❌ --format {args.output_format} requires {package}. Install it with 'pip install {package}'.")
+        return 2
+    if args.shard_rows is not None:
+        if args.output_format != "xlsx":
+            print("❌ --sharded only applies to --format xlsx.")
+            return 2
+        if args.shard_rows < 2:
+            print("❌ --sharded needs at least 2 rows per shard.")
+            return 2
+        if args.all_services and not args.combined:
+            print("❌ In batch mode --sharded needs --combined; per-service workbooks are already written in parallel.")
+            return 2
+    if args.no_cache:
+        os.environ["CSP_RESULT_CACHE"] = "off"
+    if args.http_record or args.http_replay:
+        from utils.http_archive import configure_archive
+    if args.http_record:
+        configure_archive("record", args.http_record)
+    elif args.http_replay:
+        if not args.http_replay.is_dir():
+            print(f"❌ HTTP archive '{args.http_replay}' does not exist.")
+            return 2
+        configure_archive("replay", args.http_replay)
+
+    format_name = format_label(args.output_format)
+    print(f"📡 Extracting CSP APIs and writing to {format_name}...")
 
     project_root = Path(__file__).resolve().parent
     default_output_dir = project_root / "OUTPUT_FILES"
@@ -728,18 +1585,52 @@ def main():
         default_output_dir.mkdir(parents=True, exist_ok=True)
     except OSError as exc:
         print(f"❌ Unable to create default output directory '{default_output_dir}': {exc}")
-        return
+        return 1
+
+    if args.all_services:
+        output_dir = (args.output_dir or default_output_dir).expanduser().resolve()
+        try:
+            output_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as exc:
+            print(f"❌ Unable to create output directory '{output_dir}': {exc}")
+            return 1
+        combined_file = None
+        if args.combined:
+            combined_file = Path(args.combined).expanduser()
+            extension = output_extension(args.output_format)
+            if combined_file.suffix.lower() != extension:
+                combined_file = combined_file.with_name(combined_file.name + extension)
+            if not combined_file.is_absolute() and combined_file.parent == Path("."):
+                combined_file = output_dir / combined_file
+            combined_file = combined_file.resolve()
+        return run_batch(
+            args.provider,
+            output_dir,
+            args.jobs,
+            combined_file,
+            streaming=args.streaming,
+            compact=args.compact,
+            refresh_catalog=args.refresh_catalog,
+            output_format=args.output_format,
+            param_db=args.param_db,
+            incremental=args.incremental,
+            shard_rows=args.shard_rows,
+        )
 
     service_cache = load_service_cache()
 
-    provider = input("Enter CSP (e.g. aws, gcp, azure): ").strip().lower()
+    provider = args.provider or input("Enter CSP (e.g. aws, gcp, azure): ").strip().lower()
     if provider not in PROVIDER_DEFAULTS:
         print(f"❌ Unsupported provider '{provider}'.")
-        return
+        return 1
 
-    available_services, service_cache_dirty = get_service_list(provider, service_cache)
-    if service_cache_dirty:
-        save_service_cache(service_cache)
+    with span("catalog.refresh", provider=provider):
+        available_services, _ = get_service_list(
+            provider,
+            service_cache,
+            background=True,
+            force=args.refresh_catalog,
+        )
 
     service_lookup = {svc.lower(): svc for svc in available_services}
 
@@ -773,9 +1664,8 @@ def main():
         if available_services:
             print(f"⚠️ '{service_input}' not found in refreshed {provider.upper()} services. Continuing anyway.")
 
-    safe_service_name = "".join(ch if ch.isalnum() else "-" for ch in service).strip("-") or f"{provider}-service"
-    safe_service_name = "-".join(filter(None, safe_service_name.split("-")))
-    default_output_file = f"{provider}-{safe_service_name.lower()}-api-extract.xlsx"
+    extension = output_extension(args.output_format)
+    default_output_file = default_output_filename(provider, service, args.output_format)
 
     while True:
         accept_default = input(
@@ -785,26 +1675,28 @@ def main():
             output_file = default_output_file
             break
         if accept_default in {"no", "n"}:
-            output_file = input("Enter output Excel file name (without extension optional): ").strip()
+            output_file = input(f"Enter output {format_name} file name (without extension optional): ").strip()
             while not output_file:
-                output_file = input("File name cannot be empty. Enter output Excel file name: ").strip()
+                output_file = input(f"File name cannot be empty. Enter output {format_name} file name: ").strip()
             break
         print("Please respond with 'Press Enter/yes' or 'no'.")
 
-    if not output_file.endswith(".xlsx"):
-        output_file += ".xlsx"
+    if not output_file.endswith(extension):
+        output_file += extension
 
     while True:
-        save_to_default = input("Save Excel file to OUTPUT_FILES? (Press Enter/yes for default folder, no for custom path): ").strip().lower()
+        save_to_default = input(
+            f"Save {format_name} file to OUTPUT_FILES? (Press Enter/yes for default folder, no for custom path): "
+        ).strip().lower()
         if save_to_default in {"", "yes", "y"}:
             output_path = default_output_dir / output_file
             break
         if save_to_default in {"no", "n"}:
-            custom_destination = input("Enter the directory or full file path for the Excel file: ").strip()
+            custom_destination = input(f"Enter the directory or full file path for the {format_name} file: ").strip()
             while not custom_destination:
                 custom_destination = input("Path cannot be empty. Enter the directory or full file path: ").strip()
             custom_path = Path(custom_destination).expanduser()
-            if custom_path.suffix.lower() == ".xlsx":
+            if custom_path.suffix.lower() == extension:
                 custom_path.parent.mkdir(parents=True, exist_ok=True)
                 output_path = custom_path
             else:
@@ -815,10 +1707,9 @@ def main():
 
     output_path = output_path.resolve()
 
-    extractor = EXTRACTOR_MAP.get(provider)
-    if extractor is None:
+    if get_extractor(provider) is None:
         print(f"❌ No extractor configured for provider '{provider}'.")
-        return
+        return 1
 
     if provider == "aws":
         service_variants = prompt_for_related_aws_variants(service, available_services)
@@ -827,47 +1718,51 @@ def main():
     else:
         service_variants = [(service, service)]
 
-    variant_runs = []
-    for actual_service, display_service in service_variants:
-        label = display_service or actual_service
-        try:
-            tree_data = extractor(actual_service)
-        except RuntimeError as exc:
-            print(f"❌ {exc}")
-            continue
-        except Exception as exc:
-            print(f"❌ Unexpected error while extracting {provider.upper()} APIs for '{actual_service}': {exc}")
-            continue
-
-        if not tree_data:
-            print(f"⚠️ No API methods were returned for '{actual_service}'.")
-            continue
-
-        variant_runs.append({
-            "key": actual_service,
-            "label": label,
-            "data": tree_data,
-        })
-
-    if not variant_runs:
-        print("⚠️ Extraction completed but produced no data. Excel files were not created.")
-        return
-
+    jobs = max(1, min(args.jobs, len(service_variants)))
+    if len(service_variants) > 1:
+        print(f"📡 Extracting {len(service_variants)} variants with {jobs} worker(s)...")
+    # Only the streaming writer frees each variant once its sheet is written; sharding needs every run up front.
+    streaming = args.streaming or (len(service_variants) > 1 and not args.shard_rows)
+    variant_runs = iter_variant_runs(provider, service_variants, jobs, args.compact, args.param_db)
     try:
-        write_to_excel(variant_runs, str(output_path), provider)
+        first_run = next(variant_runs, None)
+        if first_run is None:
+            print(f"⚠️ Extraction completed but produced no data. No {format_name} file was created.")
+            return 1
+
+        with span("write", format=args.output_format):
+            shard_paths = write_output(
+                itertools.chain([first_run], variant_runs),
+                str(output_path),
+                provider,
+                args.output_format,
+                streaming=streaming,
+                shard_rows=args.shard_rows,
+                jobs=args.jobs,
+            )
     except PermissionError:
         print(f"❌ Unable to write to '{output_path}'. Close the file if it's open and try again.")
-        return
+        return 1
     except OSError as exc:
-        print(f"❌ Failed to write Excel file '{output_path}': {exc}")
-        return
+        print(f"❌ Failed to write output file '{output_path}': {exc}")
+        return 1
+    except RuntimeError as exc:
+        print(f"❌ {exc}")
+        return 1
+    finally:
+        variant_runs.close()
 
     print(f"✅ Done! API structure saved to: {output_path}")
+    if args.shard_rows:
+        _print_shards(shard_paths)
+    return 0
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main())
     except KeyboardInterrupt:
         print("\n❌ Operation cancelled by user.")
+        sys.exit(130)
     except EOFError:
         print("\n❌ Input stream closed unexpectedly. Please rerun the command.")
+        sys.exit(1)
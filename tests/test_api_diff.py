@@ -0,0 +1,74 @@
+from utils.api_diff import diff_exports
+from writer.jsonl_writer import write_to_jsonl
+
+
+def _operation(resource, method, tree):
+    return {"apiPath": f"https://compute.googleapis.com/{resource}/{method}", "resource": resource, "method": method, "tree": tree}
+
+
+def _export(path, runs):
+    write_to_jsonl(runs, str(path), "gcp")
+    return path
+
+
+V1_OPERATIONS = [
+    _operation("instances", "insert", [(0, "name (required) (string)"), (0, "disks [array]"), (1, "boot (boolean)")]),
+    _operation("instances", "delete", [(0, "instance (required) (string)")]),
+    _operation("disks", "resize", [(0, "sizeGb (string)")]),
+]
+BETA_OPERATIONS = [
+    _operation("instances", "insert", [(0, "name (required) (string)"), (0, "disks [array]"), (1, "boot (required) (boolean)")]),
+    _operation("instances", "delete", [(0, "instance (required) (string)")]),
+    _operation("instances", "suspend", [(0, "instance (required) (string)")]),
+]
+
+
+def test_diff_of_two_versions_matches_operations_across_variants(tmp_path):
+    old = _export(tmp_path / "v1.jsonl", [{"key": "compute@v1", "label": "compute (v1)", "data": V1_OPERATIONS}])
+    new = _export(tmp_path / "beta.jsonl", [{"key": "compute@beta", "label": "compute (beta)", "data": BETA_OPERATIONS}])
+
+    report = diff_exports(old, new)
+
+    assert report["summary"] == {
+        "added_operations": 1,
+        "removed_operations": 1,
+        "changed_operations": 1,
+        "unchanged_operations": 1,
+    }
+    assert [(op["resource"], op["method"]) for op in report["added_operations"]] == [("instances", "suspend")]
+    assert [(op["resource"], op["method"]) for op in report["removed_operations"]] == [("disks", "resize")]
+    (changed,) = report["changed_operations"]
+    assert (changed["variant"], changed["old_variant"]) == ("compute (beta)", "compute (v1)")
+    assert changed["changed"] == [
+        {
+            "parameter": "disks.boot",
+            "old": {"type": "boolean", "required": False},
+            "new": {"type": "boolean", "required": True},
+        }
+    ]
+    assert report["variants"] == {"old": ["compute (v1)"], "new": ["compute (beta)"], "matched": False}
+
+
+def test_diff_of_two_versions_can_still_match_variants(tmp_path):
+    old = _export(tmp_path / "v1.jsonl", [{"key": "compute@v1", "label": "compute (v1)", "data": V1_OPERATIONS}])
+    new = _export(tmp_path / "beta.jsonl", [{"key": "compute@beta", "label": "compute (beta)", "data": BETA_OPERATIONS}])
+
+    summary = diff_exports(old, new, ignore_variants=False)["summary"]
+
+    assert summary["added_operations"] == 3
+    assert summary["removed_operations"] == 3
+    assert summary["unchanged_operations"] == 0
+
+
+def test_multi_variant_exports_compare_each_variant_with_its_counterpart(tmp_path):
+    runs = [
+        {"key": "compute@v1", "label": "compute (v1)", "data": V1_OPERATIONS},
+        {"key": "compute@beta", "label": "compute (beta)", "data": BETA_OPERATIONS},
+    ]
+    old = _export(tmp_path / "old.jsonl", runs)
+    new = _export(tmp_path / "new.jsonl", runs)
+
+    report = diff_exports(old, new)
+
+    assert report["summary"]["unchanged_operations"] == 6
+    assert report["variants"]["matched"] is True
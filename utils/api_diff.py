@@ -0,0 +1,285 @@
+"""Structural diff of two extraction exports.
+
+Operations are keyed by ``(variant, resource, method)``, so exports holding
+several service variants or versions (AWS families, GCP versions, combined
+batch output) compare each variant against its own counterpart. When each
+export holds a single variant (say ``compute (v1)`` and ``compute (beta)``),
+or when asked to, operations are matched on ``(resource, method)`` instead.
+Each one is first compared by
+a digest of its raw ``(level, label)`` rows, so unchanged operations never
+have their parameter trees built. For the rest the trees are rebuilt with a
+digest per node covering its own attributes and all of its descendants, so
+equal subtrees are skipped with a single comparison and only changed
+branches are walked.
+"""
+
+import csv
+import hashlib
+import json
+from operator import itemgetter
+from pathlib import Path
+
+from utils.param_store import parse_label
+
+
+class ParamNode:
+    __slots__ = ("name", "type", "required", "children", "digest")
+
+    def __init__(self, name, param_type=None, required=False):
+        self.name = name
+        self.type = param_type
+        self.required = required
+        self.children = {}
+        self.digest = None
+
+    def attributes(self):
+        return {"type": self.type, "required": self.required}
+
+
+class Operation:
+    """Raw ``(level, label)`` rows of one operation; the parameter tree is only built on demand."""
+
+    __slots__ = ("variant", "resource", "method", "api_path", "rows", "_digest")
+
+    def __init__(self, variant, resource, method, api_path):
+        self.variant = variant
+        self.resource = resource
+        self.method = method
+        self.api_path = api_path
+        self.rows = []
+        self._digest = None
+
+    @property
+    def digest(self):
+        if self._digest is None:
+            payload = "\n".join(f"{level}\t{label}" for level, label in self.rows)
+            self._digest = hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+        return self._digest
+
+    def tree(self):
+        root = ParamNode("")
+        chain = [(-1, root)]
+        for level, label in self.rows:
+            while chain[-1][0] >= level:
+                chain.pop()
+            parent = chain[-1][1]
+            name, param_type, required = parse_label(label)
+            node = ParamNode(name, param_type, required)
+            parent.children[_child_key(parent.children, name)] = node
+            chain.append((level, node))
+        _seal(root)
+        return root
+
+
+def _child_key(children, name):
+    # Keep sibling parameters that share a name apart instead of merging them.
+    key = name
+    counter = 2
+    while key in children:
+        key = f"{name}#{counter}"
+        counter += 1
+    return key
+
+
+def _seal(node):
+    """Fills in ``digest`` bottom-up without recursion."""
+    stack = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if not expanded:
+            stack.append((current, True))
+            stack.extend((child, False) for child in current.children.values())
+            continue
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{current.name}\0{current.type}\0{int(current.required)}".encode("utf-8"))
+        for key, child in current.children.items():
+            digest.update(key.encode("utf-8"))
+            digest.update(child.digest)
+        current.digest = digest.digest()
+
+
+def build_operations(records):
+    """Groups ``RECORD_COLUMNS`` rows into ``{(variant, resource, method): Operation}``."""
+    operations = {}
+    for _, variant, resource, method, api_path, level, parameter in records:
+        key = (variant, resource, method)
+        operation = operations.get(key)
+        if operation is None:
+            operation = operations[key] = Operation(variant, resource, method, api_path)
+        if level is not None and parameter is not None:
+            operation.rows.append((level, parameter))
+    return operations
+
+
+def variants(operations):
+    return sorted({operation.variant for operation in operations.values()})
+
+
+def key_without_variant(operations):
+    """Re-keys ``build_operations`` output on ``(resource, method)``, to compare exports of different variants."""
+    rekeyed = {}
+    for operation in operations.values():
+        key = (operation.resource, operation.method)
+        other = rekeyed.setdefault(key, operation)
+        if other is not operation:
+            raise RuntimeError(
+                f"Cannot match operations across variants: {operation.resource} {operation.method} "
+                f"appears in both '{other.variant}' and '{operation.variant}'."
+            )
+    return rekeyed
+
+
+def _parse_level(value):
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+def read_export(path):
+    """Yields ``RECORD_COLUMNS`` tuples from a CSV, JSONL or Parquet export."""
+    from writer.rows import RECORD_COLUMNS
+
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".jsonl":
+        columns = itemgetter(*RECORD_COLUMNS)
+        loads = json.JSONDecoder().decode
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    yield columns(loads(line))
+    elif suffix == ".csv":
+        with open(path, encoding="utf-8", newline="") as handle:
+            for row in csv.DictReader(handle):
+                values = [row.get(column) or "" for column in RECORD_COLUMNS]
+                values[5] = _parse_level(values[5])
+                values[6] = values[6] if values[5] is not None else None
+                yield tuple(values)
+    elif suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Reading Parquet exports requires pyarrow. Install it with 'pip install pyarrow'.") from None
+        for batch in pq.ParquetFile(str(path)).iter_batches(columns=list(RECORD_COLUMNS)):
+            yield from zip(*(batch.column(index).to_pylist() for index in range(len(RECORD_COLUMNS))))
+    else:
+        raise RuntimeError(f"Cannot diff '{path}': expected a .jsonl, .csv or .parquet export (see --format).")
+
+
+def load_operations(path):
+    try:
+        return build_operations(read_export(path))
+    except (ValueError, KeyError) as exc:
+        raise RuntimeError(f"'{path}' is not a valid extraction export: {exc}") from exc
+
+
+def _diff_nodes(old_root, new_root):
+    added = []
+    removed = []
+    changed = []
+    stack = [((), old_root, new_root)]
+    while stack:
+        path, old_node, new_node = stack.pop()
+        if old_node.digest == new_node.digest:
+            continue
+        if path and old_node.attributes() != new_node.attributes():
+            changed.append({"parameter": ".".join(path), "old": old_node.attributes(), "new": new_node.attributes()})
+        for key, old_child in old_node.children.items():
+            new_child = new_node.children.get(key)
+            if new_child is None:
+                removed.append({"parameter": ".".join(path + (key,)), **old_child.attributes()})
+            else:
+                stack.append((path + (key,), old_child, new_child))
+        for key, new_child in new_node.children.items():
+            if key not in old_node.children:
+                added.append({"parameter": ".".join(path + (key,)), **new_child.attributes()})
+    for entries in (added, removed, changed):
+        entries.sort(key=lambda entry: entry["parameter"])
+    return added, removed, changed
+
+
+def _operation_order(entry):
+    return entry["variant"], entry["resource"], entry["method"]
+
+
+def _operation_ref(operation):
+    return {"variant": operation.variant, "resource": operation.resource, "method": operation.method, "api_path": operation.api_path}
+
+
+def diff_operations(old, new):
+    """Compares two ``build_operations`` results and returns a JSON-serialisable report."""
+    added = [_operation_ref(new[key]) for key in new if key not in old]
+    removed = [_operation_ref(old[key]) for key in old if key not in new]
+    changed = []
+    unchanged = 0
+    for key, old_operation in old.items():
+        new_operation = new.get(key)
+        if new_operation is None:
+            continue
+        if old_operation.digest == new_operation.digest and old_operation.api_path == new_operation.api_path:
+            unchanged += 1
+            continue
+        params_added, params_removed, params_changed = _diff_nodes(old_operation.tree(), new_operation.tree())
+        entry = _operation_ref(new_operation)
+        if old_operation.variant != new_operation.variant:
+            entry["old_variant"] = old_operation.variant
+        if old_operation.api_path != new_operation.api_path:
+            entry["old_api_path"] = old_operation.api_path
+        entry.update(added=params_added, removed=params_removed, changed=params_changed)
+        changed.append(entry)
+
+    return {
+        "summary": {
+            "added_operations": len(added),
+            "removed_operations": len(removed),
+            "changed_operations": len(changed),
+            "unchanged_operations": unchanged,
+        },
+        "added_operations": sorted(added, key=_operation_order),
+        "removed_operations": sorted(removed, key=_operation_order),
+        "changed_operations": sorted(changed, key=_operation_order),
+    }
+
+
+def diff_exports(old_path, new_path, ignore_variants=None):
+    """Diffs two exports. ``ignore_variants`` of ``None`` ignores them when each export holds a single variant."""
+    old = load_operations(old_path)
+    new = load_operations(new_path)
+    old_variants = variants(old)
+    new_variants = variants(new)
+    if ignore_variants is None:
+        ignore_variants = len(old_variants) <= 1 and len(new_variants) <= 1
+    if ignore_variants:
+        old = key_without_variant(old)
+        new = key_without_variant(new)
+    report = diff_operations(old, new)
+    report["variants"] = {"old": old_variants, "new": new_variants, "matched": not ignore_variants}
+    return report
+
+
+def iter_change_rows(report):
+    """Flattens a report into ``(change, variant, resource, method, parameter, old, new)`` rows."""
+    for operation in report["added_operations"]:
+        yield ("operation added", *_operation_key(operation), None, None, operation["api_path"])
+    for operation in report["removed_operations"]:
+        yield ("operation removed", *_operation_key(operation), None, operation["api_path"], None)
+    for operation in report["changed_operations"]:
+        key = _operation_key(operation)
+        if "old_api_path" in operation:
+            yield ("api path changed", *key, None, operation["old_api_path"], operation["api_path"])
+        for param in operation["removed"]:
+            yield ("parameter removed", *key, param["parameter"], _describe(param), None)
+        for param in operation["added"]:
+            yield ("parameter added", *key, param["parameter"], None, _describe(param))
+        for param in operation["changed"]:
+            old, new = param["old"], param["new"]
+            change = "required changed" if old["type"] == new["type"] else "parameter changed"
+            yield (change, *key, param["parameter"], _describe(old), _describe(new))
+
+
+def _operation_key(operation):
+    return operation["variant"], operation["resource"], operation["method"]
+
+
+def _describe(attributes):
+    return ", ".join(filter(None, [attributes.get("type"), "required" if attributes.get("required") else None])) or None
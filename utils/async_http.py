@@ -0,0 +1,113 @@
+"""Asyncio front end to the shared HTTP stack, for driving many extractions from one event loop.
+
+Each request runs on a bounded I/O thread pool through the same
+``http_get``/``cached_http_get`` as the blocking extractors. Record/replay,
+the conditional-GET disk cache, connection pooling and tracing all still
+apply. Concurrency is capped per event loop, overall
+(``CSP_ASYNC_MAX_REQUESTS``) and per host (``CSP_HTTP_MAX_PER_HOST``), with
+asyncio semaphores, so waiting tasks never occupy a thread. Retries and
+backoff run on the event loop, so a cancelled task stops at once and never
+starts another attempt. An attempt already in flight finishes in its thread,
+bounded by its timeout, and its result is discarded.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlsplit
+
+import requests
+
+from utils import http_client
+from utils.http_archive import http_get
+from utils.http_cache import cached_http_get
+
+MAX_REQUESTS_ENV = "CSP_ASYNC_MAX_REQUESTS"
+DEFAULT_MAX_REQUESTS = 32
+
+_executor_lock = threading.Lock()
+_io_executor = None
+_loop_limits = weakref.WeakKeyDictionary()
+
+
+def max_requests():
+    try:
+        return max(1, int(os.environ.get(MAX_REQUESTS_ENV, DEFAULT_MAX_REQUESTS)))
+    except ValueError:
+        return DEFAULT_MAX_REQUESTS
+
+
+def _executor():
+    global _io_executor
+    if _io_executor is None:
+        with _executor_lock:
+            if _io_executor is None:
+                _io_executor = ThreadPoolExecutor(max_workers=max_requests(), thread_name_prefix="csp-async-http")
+    return _io_executor
+
+
+class _Limits:
+    """The semaphores of one event loop."""
+
+    def __init__(self):
+        self.total = asyncio.Semaphore(max_requests())
+        self._hosts = {}
+
+    def host(self, host):
+        slot = self._hosts.get(host)
+        if slot is None:
+            slot = self._hosts[host] = asyncio.Semaphore(http_client.max_per_host())
+        return slot
+
+
+def _limits():
+    loop = asyncio.get_running_loop()
+    limits = _loop_limits.get(loop)
+    if limits is None:
+        limits = _loop_limits[loop] = _Limits()
+    return limits
+
+
+async def run_blocking(func, *args, executor=None):
+    """Runs ``func(*args)`` on ``executor`` (the loop's default pool when ``None``) without blocking the loop."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+async def get(url, headers=None, timeout=None, cached=False):
+    """Async ``http_get``, or ``cached_http_get`` when ``cached``, with bounded concurrency and retries.
+
+    Returns the last response (possibly still a 429/5xx once retries run out)
+    and re-raises the last connection error or timeout, like ``http_client.get``.
+    """
+    if cached:
+        fetch = partial(cached_http_get, url, timeout=timeout, retries=0)
+    else:
+        fetch = partial(http_get, url, headers=headers, timeout=timeout, retries=0)
+    limits = _limits()
+    host_slot = limits.host(urlsplit(url).netloc)
+    retries = http_client.max_retries()
+    attempt = 0
+
+    while True:
+        response = None
+        error = None
+        async with limits.total, host_slot:
+            try:
+                response = await run_blocking(fetch, executor=_executor())
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                error = exc
+        attempt += 1
+        retryable = error is not None or response.status_code in http_client.RETRY_STATUSES
+        if not retryable or attempt > retries:
+            break
+        retry_after = None
+        if response is not None:
+            retry_after = http_client.retry_after_seconds(response.headers.get("Retry-After"))
+        await asyncio.sleep(http_client.backoff_seconds(attempt - 1, retry_after))
+
+    if error is not None:
+        raise error
+    return response
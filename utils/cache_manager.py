@@ -1,29 +1,131 @@
 import json
+import os
+import time
 from pathlib import Path
 
+from utils.disk_store import atomic_write_bytes, file_lock
+
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 SERVICE_CACHE_PATH = BASE_DIR / "service_catalog_cache.json"
+CACHE_FORMAT_VERSION = 2
+# AWS comes from the installed Botocore models, so it only changes when Botocore is upgraded.
+CATALOG_TTL_SECONDS = {
+    "aws": 7 * 24 * 3600,
+    "gcp": 24 * 3600,
+    "azure": 24 * 3600,
+}
+DEFAULT_CATALOG_TTL_SECONDS = 24 * 3600
+CATALOG_TTL_ENV = "CSP_CATALOG_TTL"
+
+# Layout of service_catalog_cache.json (compact JSON):
+#   {"version": 2, "providers": {"<provider>": {
+#       "services": [...], "fetched_at": <epoch>,
+#       "etag": "...", "last_modified": "...",    # validators of the catalog listing
+#       "botocore_version": "...",                # aws
+#       "apis": {"<service>": {"<version>": "<discoveryRestUrl>"}},  # gcp
+#       "readmes": {"<service>": "<readme url>"},                  # azure
+#   }}}
+
+
+def _empty_cache():
+    return {"version": CACHE_FORMAT_VERSION, "providers": {}}
+
+
+def _migrate(data):
+    if not isinstance(data, dict):
+        return _empty_cache()
+    if data.get("version") == CACHE_FORMAT_VERSION and isinstance(data.get("providers"), dict):
+        return data
+
+    # Version 1 stored bare service lists per provider, plus an optional refreshed_at map.
+    cache = _empty_cache()
+    refreshed_at = data.get("refreshed_at") if isinstance(data.get("refreshed_at"), dict) else {}
+    for provider, services in data.items():
+        if not isinstance(services, list):
+            continue
+        entry = {"services": services}
+        if isinstance(refreshed_at.get(provider), (int, float)):
+            entry["fetched_at"] = refreshed_at[provider]
+        cache["providers"][provider] = entry
+    return cache
+
+
+def _lock_path(path):
+    return path.with_name(path.name + ".lock")
 
 
 def _load_json(path):
     try:
-        with path.open("r", encoding="utf-8") as handle:
-            return json.load(handle)
+        return _migrate(json.loads(path.read_bytes()))
     except FileNotFoundError:
-        return {}
-    except json.JSONDecodeError as exc:
+        return _empty_cache()
+    except (ValueError, OSError) as exc:
         print(f"⚠️ Unable to read cached service catalog ({exc}). Rebuilding it from scratch.")
-        return {}
+        return _empty_cache()
 
 
 def _save_json(path, data):
-    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+    atomic_write_bytes(path, payload.encode("utf-8"))
 
 
 def load_service_cache():
+    # Writers replace the file atomically, so readers never see a partial document and need no lock.
     return _load_json(SERVICE_CACHE_PATH)
 
 
 def save_service_cache(cache):
-    _save_json(SERVICE_CACHE_PATH, cache)
+    with file_lock(_lock_path(SERVICE_CACHE_PATH)):
+        _save_json(SERVICE_CACHE_PATH, cache)
+
+
+def update_service_cache(mutator):
+    """Applies ``mutator(cache)`` to the on-disk cache under an exclusive lock and saves it.
+
+    The cache is re-read inside the lock so concurrent processes merge their
+    changes instead of overwriting each other. Returns the updated cache.
+    """
+    with file_lock(_lock_path(SERVICE_CACHE_PATH)):
+        cache = _load_json(SERVICE_CACHE_PATH)
+        mutator(cache)
+        _save_json(SERVICE_CACHE_PATH, cache)
+    return cache
+
+
+def provider_entry(cache, provider):
+    return cache.setdefault("providers", {}).setdefault(provider, {})
+
+
+def cached_services(cache, provider):
+    return list((cache.get("providers", {}).get(provider) or {}).get("services") or [])
+
+
+def store_services(cache, provider, services, timestamp=None):
+    entry = provider_entry(cache, provider)
+    entry["services"] = list(services)
+    entry["fetched_at"] = int(timestamp if timestamp is not None else time.time())
+    return entry
+
+
+def catalog_ttl(provider):
+    override = os.environ.get(CATALOG_TTL_ENV)
+    if override:
+        try:
+            return max(0, int(override))
+        except ValueError:
+            print(f"⚠️ Ignoring invalid {CATALOG_TTL_ENV}={override!r}; expected a number of seconds.")
+    return CATALOG_TTL_SECONDS.get(provider, DEFAULT_CATALOG_TTL_SECONDS)
+
+
+def catalog_age(cache, provider):
+    entry = cache.get("providers", {}).get(provider) or {}
+    fetched_at = entry.get("fetched_at")
+    if not isinstance(fetched_at, (int, float)) or not entry.get("services"):
+        return None
+    return max(0.0, time.time() - fetched_at)
+
+
+def is_catalog_fresh(cache, provider):
+    age = catalog_age(cache, provider)
+    return age is not None and age < catalog_ttl(provider)
@@ -0,0 +1,120 @@
+from array import array
+
+RECORD_FIELDS = ("apiPath", "resource", "method", "tree")
+
+
+class StringTable:
+    """Interns strings and hands out their integer ids."""
+
+    __slots__ = ("_ids", "_strings")
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def intern(self, value):
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._ids[value] = string_id
+            self._strings.append(value)
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def __len__(self):
+        return len(self._strings)
+
+
+class CompactTree:
+    """Columnar ``(level, label)`` rows: levels in an ``array('B')``, labels as string-table ids."""
+
+    __slots__ = ("_levels", "_labels", "_table")
+
+    def __init__(self, rows=(), table=None):
+        self._levels = array("B")
+        self._labels = array("I")
+        self._table = table if table is not None else StringTable()
+        for level, label in rows:
+            self.append(level, label)
+
+    def append(self, level, label):
+        if not 0 <= level <= 255 and self._levels.typecode == "B":
+            self._levels = array("i", self._levels)
+        self._levels.append(level)
+        self._labels.append(self._table.intern(label))
+
+    def __iter__(self):
+        strings = self._table
+        for level, label_id in zip(self._levels, self._labels):
+            yield level, strings[label_id]
+
+    def __len__(self):
+        return len(self._levels)
+
+    def __getitem__(self, index):
+        return self._levels[index], self._table[self._labels[index]]
+
+    def __eq__(self, other):
+        if isinstance(other, (CompactTree, list, tuple)):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"CompactTree({list(self)!r})"
+
+
+class OperationRecord:
+    """Slotted stand-in for the ``{apiPath, resource, method, tree}`` dicts the extractors return."""
+
+    __slots__ = RECORD_FIELDS
+
+    def __init__(self, apiPath="", resource="", method="", tree=None):
+        self.apiPath = apiPath
+        self.resource = resource
+        self.method = method
+        self.tree = tree if tree is not None else CompactTree()
+
+    def get(self, key, default=None):
+        if key in RECORD_FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in RECORD_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {
+            "apiPath": self.apiPath,
+            "resource": self.resource,
+            "method": self.method,
+            "tree": list(self.tree),
+        }
+
+    def __eq__(self, other):
+        if isinstance(other, (OperationRecord, dict)):
+            return all(self.get(field) == other.get(field) for field in RECORD_FIELDS)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"OperationRecord(method={self.method!r}, resource={self.resource!r}, rows={len(self.tree)})"
+
+
+def compact_records(records, table=None):
+    """Converts extractor output into ``OperationRecord`` objects sharing one string table."""
+    table = table if table is not None else StringTable()
+    intern = table.intern
+    compacted = []
+    for record in records:
+        compacted.append(
+            OperationRecord(
+                apiPath=table[intern(record.get("apiPath", ""))],
+                resource=table[intern(record.get("resource", ""))],
+                method=record.get("method", ""),
+                tree=CompactTree(record.get("tree") or (), table),
+            )
+        )
+    return compacted
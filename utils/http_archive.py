@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from utils import http_client
+from utils.disk_store import atomic_write_bytes
+from utils.tracing import span
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_ARCHIVE_DIR = BASE_DIR / "http_archive"
+MODE_ENV = "CSP_HTTP_MODE"
+ARCHIVE_DIR_ENV = "CSP_HTTP_ARCHIVE"
+ARCHIVE_MODES = {"live", "record", "replay"}
+KEY_HEADERS = ("accept",)
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+_replay_lock = threading.Lock()
+_replay_entries = {}
+
+
+def archive_mode():
+    mode = os.environ.get(MODE_ENV, "live").strip().lower() or "live"
+    if mode not in ARCHIVE_MODES:
+        raise RuntimeError(f"Unsupported {MODE_ENV} '{mode}'. Use one of: {', '.join(sorted(ARCHIVE_MODES))}.")
+    return mode
+
+
+def archive_dir():
+    return Path(os.environ.get(ARCHIVE_DIR_ENV) or DEFAULT_ARCHIVE_DIR)
+
+
+def configure_archive(mode, directory=None):
+    """Selects the archive mode for this process and any worker processes it starts."""
+    os.environ[MODE_ENV] = mode
+    if directory is not None:
+        os.environ[ARCHIVE_DIR_ENV] = str(Path(directory).expanduser().resolve())
+
+
+def _request_key(url, headers):
+    relevant = sorted(
+        (name.lower(), str(value))
+        for name, value in (headers or {}).items()
+        if name.lower() in KEY_HEADERS
+    )
+    material = json.dumps(["GET", url, relevant], separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _entry_path(root, key):
+    return root / "entries" / key[:2] / f"{key}.json"
+
+
+def _blob_path(root, digest):
+    return root / "blobs" / digest[:2] / digest
+
+
+def _record(url, headers, response):
+    root = archive_dir()
+    body = response.content
+    digest = hashlib.sha256(body).hexdigest()
+    blob_path = _blob_path(root, digest)
+    if not blob_path.exists():
+        atomic_write_bytes(blob_path, zlib.compress(body, 6))
+    entry = {
+        "url": url,
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+        "body": digest,
+        "recorded_at": int(time.time()),
+    }
+    atomic_write_bytes(_entry_path(root, _request_key(url, headers)), json.dumps(entry, indent=1).encode("utf-8"))
+
+
+def _load_replay_entry(url, headers):
+    root = archive_dir()
+    key = _request_key(url, headers)
+    cache_key = (str(root), key)
+    with _replay_lock:
+        cached = _replay_entries.get(cache_key)
+    if cached is not None:
+        return cached
+
+    try:
+        entry = json.loads(_entry_path(root, key).read_text(encoding="utf-8"))
+        body = zlib.decompress(_blob_path(root, entry["body"]).read_bytes())
+    except (OSError, ValueError, KeyError, zlib.error) as exc:
+        raise requests.ConnectionError(f"No archived response for {url} in '{root}' (replay mode): {exc}") from exc
+
+    with _replay_lock:
+        _replay_entries[cache_key] = (entry, body)
+    return entry, body
+
+
+def build_response(url, entry, body):
+    """Builds a ``requests.Response`` from a stored ``{status, reason, headers}`` entry and body."""
+    response = requests.Response()
+    response.url = url
+    response.status_code = entry.get("status", 200)
+    response.reason = entry.get("reason", "")
+    response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+    response._content = body
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+    return response
+
+
+def http_get(url, headers=None, timeout=None, retries=None):
+    """Shared-client ``GET`` that records to or replays from the local archive depending on ``CSP_HTTP_MODE``."""
+    mode = archive_mode()
+    with span("http.get", url=url, mode=mode) as phase:
+        if mode == "replay":
+            entry, body = _load_replay_entry(url, headers)
+            phase.add(bytes=len(body))
+            return build_response(url, entry, body)
+
+        response = http_client.get(url, headers=headers, timeout=timeout, retries=retries)
+        phase.set(status=response.status_code)
+        phase.add(bytes=len(response.content))
+    # A 304 only makes sense against the caller's own cached copy; the archive keeps full bodies.
+    if mode == "record" and response.status_code != 304:
+        try:
+            _record(url, headers, response)
+        except OSError as exc:
+            print(f"⚠️ Unable to archive response for {url}: {exc}")
+    return response
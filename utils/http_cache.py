@@ -0,0 +1,131 @@
+"""Persistent conditional-GET cache for spec documents.
+
+Each cached URL has a small JSON entry (validators and stored headers) and
+a zlib-compressed body stored under its SHA-256, so identical documents
+served from different URLs share one blob. Every request is revalidated with
+``If-None-Match``/``If-Modified-Since``; a ``304`` is answered from disk, so a
+warm cache transfers almost nothing. When the network is unreachable (or the
+server keeps failing) the cached copy is served stale. Only active in live
+mode: record and replay runs go straight to the HTTP archive.
+"""
+
+import hashlib
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+
+import requests
+
+from utils.disk_store import atomic_write_bytes, enforce_size_cap, touch
+from utils.http_archive import STORED_HEADERS, archive_mode, build_response, http_get
+from utils.tracing import span
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+HTTP_CACHE_DIR = BASE_DIR / ".http_cache"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _cache_dir():
+    return Path(os.environ.get("CSP_HTTP_CACHE_DIR") or HTTP_CACHE_DIR)
+
+
+def http_cache_enabled():
+    return os.environ.get("CSP_HTTP_CACHE", "").lower() not in {"0", "off", "false", "no"}
+
+
+def _entry_path(root, url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return root / "entries" / key[:2] / f"{key}.json"
+
+
+def _blob_path(root, digest):
+    return root / "blobs" / digest[:2] / digest
+
+
+def _load(root, url):
+    entry_path = _entry_path(root, url)
+    try:
+        entry = json.loads(entry_path.read_text(encoding="utf-8"))
+        blob_path = _blob_path(root, entry["body"])
+        body = zlib.decompress(blob_path.read_bytes())
+    except (OSError, ValueError, KeyError, zlib.error):
+        return None, None
+    if entry.get("url") != url:
+        return None, None
+    touch(entry_path)
+    touch(blob_path)
+    return entry, body
+
+
+def _store(root, url, response):
+    body = response.content
+    digest = hashlib.sha256(body).hexdigest()
+    blob_path = _blob_path(root, digest)
+    if blob_path.exists():
+        touch(blob_path)
+    else:
+        atomic_write_bytes(blob_path, zlib.compress(body, 6))
+    entry = {
+        "url": url,
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+        "body": digest,
+        "stored_at": int(time.time()),
+    }
+    atomic_write_bytes(_entry_path(root, url), json.dumps(entry, indent=1).encode("utf-8"))
+    enforce_size_cap(root, HTTP_CACHE_MAX_BYTES)
+
+
+def _validators(entry):
+    headers = {}
+    stored = entry.get("headers") or {}
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last-modified"):
+        headers["If-Modified-Since"] = stored["last-modified"]
+    return headers
+
+
+def cached_http_get(url, timeout=None, retries=None):
+    """``http_get`` for immutable-ish documents, revalidated against the on-disk copy.
+
+    Returns a full ``200`` response in every case where a body is available,
+    so callers never see the ``304``. With a cached copy the revalidation is
+    not retried: a failing or throttled host falls back to the copy at once.
+    """
+    if archive_mode() != "live" or not http_cache_enabled():
+        return http_get(url, timeout=timeout, retries=retries)
+
+    root = _cache_dir()
+    entry, body = _load(root, url)
+    with span("http_cache", url=url) as phase:
+        try:
+            if entry is None:
+                response = http_get(url, timeout=timeout, retries=retries)
+            else:
+                response = http_get(url, headers=_validators(entry), timeout=timeout, retries=0)
+        except requests.RequestException as exc:
+            if entry is None:
+                raise
+            phase.set(outcome="stale")
+            print(f"⚠️ {url} is unreachable ({exc.__class__.__name__}); using the cached copy.")
+            return build_response(url, entry, body)
+
+        if entry is not None and response.status_code == 304:
+            phase.set(outcome="revalidated")
+            return build_response(url, entry, body)
+        if entry is not None and (response.status_code == 429 or response.status_code >= 500):
+            phase.set(outcome="stale")
+            print(f"⚠️ {url} returned HTTP {response.status_code}; using the cached copy.")
+            return build_response(url, entry, body)
+
+        phase.set(outcome="miss" if entry is None else "updated")
+        if response.status_code == 200:
+            try:
+                _store(root, url, response)
+            except OSError as exc:
+                print(f"⚠️ Unable to update the HTTP cache for {url}: {exc}")
+        return response
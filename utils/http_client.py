@@ -0,0 +1,144 @@
+"""Shared HTTP client: one pooled ``requests.Session`` per process, per-host
+concurrency caps, and retries with exponential backoff on throttling.
+
+Retries cover connection errors, timeouts and 429/5xx responses. The wait
+before attempt ``n`` is drawn uniformly from ``[0, min(cap, base * 2**n)]``
+("full jitter") unless the server sent ``Retry-After``, which wins. A request
+gives up its host slot while it sleeps, so a throttled host never blocks
+other requests to it from making progress.
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.tracing import span
+
+MAX_PER_HOST_ENV = "CSP_HTTP_MAX_PER_HOST"
+RETRIES_ENV = "CSP_HTTP_RETRIES"
+DEFAULT_MAX_PER_HOST = 6
+DEFAULT_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 30.0
+MAX_RETRY_AFTER_SECONDS = 120.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+USER_AGENT = "csp-api-extractor"
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_host_slots = {}
+
+
+def _env_int(name, default, minimum):
+    try:
+        return max(minimum, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+def max_per_host():
+    return _env_int(MAX_PER_HOST_ENV, DEFAULT_MAX_PER_HOST, 1)
+
+
+def max_retries():
+    return _env_int(RETRIES_ENV, DEFAULT_RETRIES, 0)
+
+
+def get_session():
+    """Returns this process's pooled session (recreated after a fork)."""
+    global _session, _session_pid, _host_slots
+    pid = os.getpid()
+    if _session is not None and _session_pid == pid:
+        return _session
+    with _lock:
+        if _session is None or _session_pid != pid:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max_per_host())
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+            _session_pid = pid
+            _host_slots = {}
+        return _session
+
+
+def _host_slot(host):
+    with _lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(max_per_host())
+        return slot
+
+
+def retry_after_seconds(value):
+    """Parses a ``Retry-After`` header (seconds or HTTP date); ``None`` if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER_SECONDS)
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    return min(max(0.0, delay), MAX_RETRY_AFTER_SECONDS)
+
+
+def backoff_seconds(attempt, retry_after=None):
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def get(url, headers=None, timeout=None, retries=None):
+    """``GET`` through the shared session, retrying throttled and failed attempts.
+
+    Returns the last response (which may still be a 429/5xx once retries run
+    out); re-raises the last connection error or timeout. ``retries``
+    overrides ``CSP_HTTP_RETRIES`` for callers that retry on their own.
+    """
+    host = urlsplit(url).netloc
+    session = get_session()
+    slot = _host_slot(host)
+    if retries is None:
+        retries = max_retries()
+    waited = 0.0
+    attempt = 0
+
+    with span("http.request", host=host) as phase:
+        while True:
+            response = None
+            error = None
+            with slot:
+                try:
+                    response = session.get(url, headers=headers, timeout=timeout)
+                except (requests.ConnectionError, requests.Timeout) as exc:
+                    error = exc
+            attempt += 1
+            retryable = error is not None or response.status_code in RETRY_STATUSES
+            if not retryable or attempt > retries:
+                break
+            retry_after = None
+            if response is not None:
+                retry_after = retry_after_seconds(response.headers.get("Retry-After"))
+                response.close()
+            delay = backoff_seconds(attempt - 1, retry_after)
+            waited += delay
+            time.sleep(delay)
+
+        phase.set(attempts=attempt, waited_s=round(waited, 3))
+        if response is not None:
+            phase.add(bytes=len(response.content))
+
+    if error is not None:
+        raise error
+    return response
+
@@ -0,0 +1,75 @@
+import hashlib
+import json
+from pathlib import Path
+
+from utils.disk_store import atomic_write_bytes, file_lock
+from utils.result_cache import EXTRACTOR_VERSION
+
+MANIFEST_NAME = ".extract-manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def manifest_path(directory):
+    return Path(directory) / MANIFEST_NAME
+
+
+def records_digest(records):
+    """Content hash of extracted operations, independent of how they are held in memory."""
+    digest = hashlib.sha256()
+    for record in records:
+        packed = [
+            record.get("apiPath", ""),
+            record.get("resource", ""),
+            record.get("method", ""),
+            [[level, label] for level, label in record.get("tree") or []],
+        ]
+        digest.update(json.dumps(packed, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def load_manifest(directory):
+    """Returns ``{output file name: {service: manifest entry}}`` for ``directory``."""
+    try:
+        data = json.loads(manifest_path(directory).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != MANIFEST_FORMAT:
+        return {}
+    outputs = data.get("outputs")
+    return outputs if isinstance(outputs, dict) else {}
+
+
+def update_manifest(directory, outputs):
+    """Merges ``outputs`` into the manifest of ``directory``; entries for other files are kept."""
+    path = manifest_path(directory)
+    with file_lock(path.with_name(path.name + ".lock")):
+        merged = load_manifest(directory)
+        merged.update(outputs)
+        payload = json.dumps({"format": MANIFEST_FORMAT, "outputs": merged}, indent=2, sort_keys=True)
+        atomic_write_bytes(path, payload.encode("utf-8"))
+
+
+def manifest_entry(fingerprint, records, options):
+    """The manifest entry of one service's output, written with the output ``options``."""
+    return {
+        "fingerprint": fingerprint,
+        "content_hash": records_digest(records),
+        "operations": len(records),
+        "extractor_version": EXTRACTOR_VERSION,
+        "options": options,
+    }
+
+
+def is_current(previous, options):
+    """True when ``previous`` was written by this extractor version with the same output ``options``."""
+    return bool(
+        previous
+        and previous.get("extractor_version") == EXTRACTOR_VERSION
+        and previous.get("options") == options
+    )
+
+
+def is_unchanged(previous, fingerprint):
+    """True when ``previous`` was produced from the same spec ``fingerprint``."""
+    return bool(previous and fingerprint and previous.get("fingerprint") == fingerprint)
@@ -0,0 +1,215 @@
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PARAM_DB_PATH = BASE_DIR / "api_params.db"
+PARAM_DB_FORMAT = 1
+BUSY_TIMEOUT_SECONDS = 60
+DEFAULT_QUERY_LIMIT = 50
+
+_TYPE_SUFFIX = re.compile(r" \(([A-Za-z0-9_-]+)\)$")
+_REQUIRED_SUFFIX = " (required)"
+_ARRAY_SUFFIX = " [array]"
+_MIN_TRIGRAM_TERM = 3
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    """CREATE TABLE IF NOT EXISTS params (
+        id INTEGER PRIMARY KEY,
+        provider TEXT NOT NULL,
+        service TEXT NOT NULL,
+        version TEXT NOT NULL DEFAULT '',
+        resource TEXT NOT NULL DEFAULT '',
+        method TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        parent INTEGER,
+        name TEXT NOT NULL,
+        type TEXT,
+        required INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS params_service ON params (provider, service, version)",
+    "CREATE INDEX IF NOT EXISTS params_name ON params (name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS params_parent ON params (parent)",
+    """CREATE TRIGGER IF NOT EXISTS params_fts_insert AFTER INSERT ON params BEGIN
+        INSERT INTO params_fts (rowid, name) VALUES (new.id, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS params_fts_delete AFTER DELETE ON params BEGIN
+        INSERT INTO params_fts (params_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END""",
+)
+
+_SEARCH_COLUMNS = """
+    p.provider, p.service, p.version, p.resource, p.method, p.level,
+    parent.name, p.name, p.type, p.required
+"""
+
+
+def default_db_path():
+    return Path(os.environ.get("CSP_PARAM_DB") or PARAM_DB_PATH)
+
+
+def parse_label(label):
+    """Splits a tree label such as ``KmsKeyId (required) (string)`` into ``(name, type, required)``."""
+    param_type = None
+    if label.endswith(_ARRAY_SUFFIX):
+        param_type = "array"
+        label = label[: -len(_ARRAY_SUFFIX)]
+    else:
+        match = _TYPE_SUFFIX.search(label)
+        if match and match.group(1) != "required":
+            param_type = match.group(1)
+            label = label[: match.start()]
+    required = label.endswith(_REQUIRED_SUFFIX)
+    if required:
+        label = label[: -len(_REQUIRED_SUFFIX)]
+    return label, param_type, required
+
+
+def split_service(service):
+    """``compute@v1`` -> ``("compute", "v1")``; services without a version get ``""``."""
+    name, _, version = service.partition("@")
+    return name, version
+
+
+def _create_fts(conn):
+    # The trigram tokenizer (SQLite 3.34+) matches substrings, so "kms" finds "KmsKeyId".
+    # Older builds fall back to word tokens and prefix queries.
+    for tokenizer in ("trigram", "unicode61"):
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE params_fts USING fts5("
+                f"name, content='params', content_rowid='id', tokenize='{tokenizer}')"
+            )
+        except sqlite3.OperationalError:
+            continue
+        return tokenizer
+    raise RuntimeError("The SQLite library bundled with Python does not support FTS5.")
+
+
+def open_store(path=None):
+    """Opens the parameter store at ``path`` (default: ``api_params.db``), creating it if needed."""
+    path = Path(path or default_db_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'params_fts'").fetchone() is None:
+            tokenizer = _create_fts(conn)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("format", str(PARAM_DB_FORMAT)), ("tokenizer", tokenizer)],
+            )
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        conn.close()
+        raise
+    return conn
+
+
+def _iter_param_rows(provider, service, version, records, next_id):
+    for record in records:
+        resource = record.get("resource") or service
+        method = record.get("method", "")
+        rows = []
+        # ``(depth, row)`` for the chain of ancestors of the next node.
+        ancestors = []
+        for level, label in record.get("tree") or []:
+            depth = max(0, level) if isinstance(level, int) else 0
+            while ancestors and ancestors[-1][0] >= depth:
+                ancestors.pop()
+            parent = ancestors[-1][1] if ancestors else None
+            if parent is not None and parent[9] is None:
+                parent[9] = "object"
+            name, param_type, required = parse_label(label)
+            row = [next_id, provider, service, version, resource, method, depth,
+                   parent[0] if parent is not None else None, name, param_type, int(required)]
+            rows.append(row)
+            ancestors.append((depth, row))
+            next_id += 1
+        yield from rows
+
+
+def store_records(provider, service, records, path=None):
+    """Replaces the stored parameters of ``service`` with ``records``; returns the number of rows written."""
+    service_name, version = split_service(service)
+    conn = open_store(path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM params WHERE provider = ? AND service = ? AND version = ?",
+                (provider, service_name, version),
+            )
+            next_id = (conn.execute("SELECT MAX(id) FROM params").fetchone()[0] or 0) + 1
+            rows = list(_iter_param_rows(provider, service_name, version, records, next_id))
+            conn.executemany("INSERT INTO params VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def indexed_services(provider, path=None):
+    """Returns the services of ``provider`` that have rows in the store, as ``name`` or ``name@version``."""
+    conn = open_store(path)
+    try:
+        rows = conn.execute("SELECT DISTINCT service, version FROM params WHERE provider = ?", (provider,))
+        return {f"{name}@{version}" if version else name for name, version in rows}
+    finally:
+        conn.close()
+
+
+def _fts_query(term, tokenizer):
+    quoted = '"' + term.replace('"', '""') + '"'
+    return quoted if tokenizer == "trigram" else f"{quoted}*"
+
+
+def search_params(term, provider=None, exact=False, required_only=False, limit=DEFAULT_QUERY_LIMIT, path=None):
+    """Returns parameter rows whose name contains ``term`` (or equals it, with ``exact``).
+
+    Each row is ``(provider, service, version, resource, method, level,
+    parent_name, name, type, required)``.
+    """
+    conn = open_store(path)
+    try:
+        tokenizer = conn.execute("SELECT value FROM meta WHERE key = 'tokenizer'").fetchone()[0]
+        filters = []
+        params = []
+        if exact:
+            filters.append("p.name = ? COLLATE NOCASE")
+            params.append(term)
+            source = "params AS p"
+        elif tokenizer == "trigram" and len(term) < _MIN_TRIGRAM_TERM:
+            # Trigram indexes can't answer terms shorter than three characters.
+            filters.append("p.name LIKE ? ESCAPE '\\'")
+            params.append("%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+            source = "params AS p"
+        else:
+            source = "params_fts JOIN params AS p ON p.id = params_fts.rowid"
+            filters.append("params_fts MATCH ?")
+            params.append(_fts_query(term, tokenizer))
+        if provider:
+            filters.append("p.provider = ?")
+            params.append(provider)
+        if required_only:
+            filters.append("p.required = 1")
+        sql = (
+            f"SELECT {_SEARCH_COLUMNS} FROM {source} LEFT JOIN params AS parent ON parent.id = p.parent "
+            f"WHERE {' AND '.join(filters)} "
+            "ORDER BY p.provider, p.service, p.version, p.resource, p.method, p.id LIMIT ?"
+        )
+        params.append(limit)
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
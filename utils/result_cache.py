@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import zlib
+from pathlib import Path
+
+from utils.disk_store import atomic_write_bytes, enforce_size_cap, touch
+from utils.tracing import span
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULT_CACHE_DIR = BASE_DIR / ".extract_cache"
+RESULT_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESULT_CACHE_FORMAT = 2
+# Version of what the extractors and utils/schema_parser.py produce. Bump it in
+# any change that alters extracted operations or trees (labels, refs, ordering):
+# it is part of every result-cache key and output-manifest entry, so cached
+# results and --incremental outputs from older code are rebuilt.
+EXTRACTOR_VERSION = 2
+CACHE_SUFFIX = ".bin"
+
+
+def _cache_dir():
+    return Path(os.environ.get("CSP_RESULT_CACHE_DIR") or RESULT_CACHE_DIR)
+
+
+def result_cache_enabled():
+    return os.environ.get("CSP_RESULT_CACHE", "").lower() not in {"0", "off", "false", "no"}
+
+
+def _cache_path(provider, service, fingerprint):
+    key = f"{RESULT_CACHE_FORMAT}|{EXTRACTOR_VERSION}|{provider}|{service}|{fingerprint}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return _cache_dir() / provider / f"{digest}{CACHE_SUFFIX}"
+
+
+def encode_records(records):
+    packed = [
+        [
+            record.get("apiPath", ""),
+            record.get("resource", ""),
+            record.get("method", ""),
+            [[level, label] for level, label in record.get("tree") or []],
+        ]
+        for record in records
+    ]
+    payload = json.dumps(packed, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), 6)
+
+
+def decode_records(blob):
+    packed = json.loads(zlib.decompress(blob).decode("utf-8"))
+    return [
+        {
+            "apiPath": api_path,
+            "resource": resource,
+            "method": method,
+            "tree": [(level, label) for level, label in tree],
+        }
+        for api_path, resource, method, tree in packed
+    ]
+
+
+def load_cached_result(provider, service, fingerprint):
+    if not fingerprint or not result_cache_enabled():
+        return None
+    path = _cache_path(provider, service, fingerprint)
+    try:
+        blob = path.read_bytes()
+    except OSError:
+        return None
+    try:
+        records = decode_records(blob)
+    except (zlib.error, ValueError, TypeError):
+        return None
+    touch(path)
+    return records
+
+
+def store_cached_result(provider, service, fingerprint, records):
+    if not fingerprint or not result_cache_enabled():
+        return
+    try:
+        atomic_write_bytes(_cache_path(provider, service, fingerprint), encode_records(records))
+        enforce_size_cap(_cache_dir(), RESULT_CACHE_MAX_BYTES, f"*{CACHE_SUFFIX}")
+    except OSError as exc:
+        print(f"⚠️ Unable to update extraction cache for '{service}': {exc}")
+
+
+def cached_extraction(provider, service, fingerprint, build):
+    """Returns the cached records for ``fingerprint`` or builds and stores them."""
+    with span("result_cache.load", service=service) as phase:
+        records = load_cached_result(provider, service, fingerprint)
+        phase.set(hit=records is not None)
+    if records is not None:
+        return records
+    records = build()
+    if records:
+        with span("result_cache.store", service=service):
+            store_cached_result(provider, service, fingerprint, records)
+    return records
@@ -1,46 +1,139 @@
-def parse_schema_tree(schema, all_schemas, level=0, visiting_refs=None, visiting_nodes=None):
-    rows = []
+_ENTER = 0
+_PROPERTIES = 1
+_LEAVE_REF = 2
+_LEAVE_NODE = 3
 
-    if "$ref" in schema:
-        ref = schema["$ref"]
-        if visiting_refs is None:
-            visiting_refs = set()
-        if ref in visiting_refs:
-            return rows
-        visiting_refs.add(ref)
-        schema = all_schemas.get(ref, {})
-        rows.extend(parse_schema_tree(schema, all_schemas, level, visiting_refs, visiting_nodes))
-        visiting_refs.discard(ref)
-        return rows
 
+def _iter_row_chunks(schema, all_schemas, level, visiting_refs, visiting_nodes, memo):
+    if visiting_refs is None:
+        visiting_refs = set()
     if visiting_nodes is None:
         visiting_nodes = set()
 
-    schema_id = id(schema)
-    if schema_id in visiting_nodes:
-        return rows
-    visiting_nodes.add(schema_id)
-
-    schema_type = schema.get("type")
-    if schema_type == "object":
-        props = schema.get("properties", {})
-        required_fields = set(schema.get("required", []))
-        for prop, prop_schema in props.items():
-            label = prop
-            if prop in required_fields:
-                label = f"{prop} (required)"
-            type_str = prop_schema.get("type", "object")
-            if type_str == "object":
-                rows.append((level, label))
-                rows.extend(parse_schema_tree(prop_schema, all_schemas, level + 1, visiting_refs, visiting_nodes))
-            elif type_str == "array" and "items" in prop_schema:
-                rows.append((level, f"{label} [array]"))
-                rows.extend(parse_schema_tree(prop_schema["items"], all_schemas, level + 1, visiting_refs, visiting_nodes))
-            else:
-                type_info = f"{label} ({type_str})" if type_str else label
-                rows.append((level, type_info))
-    elif schema_type == "array" and "items" in schema:
-        rows.extend(parse_schema_tree(schema["items"], all_schemas, level, visiting_refs, visiting_nodes))
-
-    visiting_nodes.discard(schema_id)
+    recording = []
+    recording_depth = {}
+    emitted = []
+
+    stack = [(_ENTER, schema, level)]
+    while stack:
+        action, payload, level = stack.pop()
+
+        if action == _PROPERTIES:
+            props, required_fields = payload
+            chunk = []
+            for prop, prop_schema in props:
+                label = prop
+                if prop in required_fields:
+                    label = f"{prop} (required)"
+                type_str = prop_schema.get("type", "object")
+                if type_str == "object":
+                    stack.append((_PROPERTIES, payload, level))
+                    stack.append((_ENTER, prop_schema, level + 1))
+                    chunk.append((level, label))
+                    break
+                if type_str == "array" and "items" in prop_schema:
+                    stack.append((_PROPERTIES, payload, level))
+                    stack.append((_ENTER, prop_schema["items"], level + 1))
+                    chunk.append((level, f"{label} [array]"))
+                    break
+                chunk.append((level, f"{label} ({type_str})" if type_str else label))
+            if chunk:
+                if recording:
+                    emitted.extend(chunk)
+                yield chunk
+            continue
+
+        if action == _LEAVE_REF:
+            visiting_refs.discard(payload)
+            if memo is not None:
+                _, depth, start, lowest_hit, reached_refs, reached_nodes = recording.pop()
+                del recording_depth[payload]
+                if lowest_hit >= depth:
+                    rows = tuple((row_level - level, label) for row_level, label in emitted[start:])
+                    memo[payload] = (rows, frozenset(reached_refs), frozenset(reached_nodes))
+                if recording:
+                    parent = recording[-1]
+                    parent[3] = min(parent[3], lowest_hit)
+                    parent[4] |= reached_refs
+                    parent[5] |= reached_nodes
+                else:
+                    del emitted[:]
+            continue
+
+        if action == _LEAVE_NODE:
+            visiting_nodes.discard(payload)
+            continue
+
+        schema = payload
+        if "$ref" in schema:
+            ref = schema["$ref"]
+            if ref in visiting_refs:
+                if recording:
+                    frame = recording[-1]
+                    frame[3] = min(frame[3], recording_depth.get(ref, -1))
+                    frame[4].add(ref)
+                continue
+            if memo is not None:
+                cached = memo.get(ref)
+                if (
+                    cached is not None
+                    and visiting_refs.isdisjoint(cached[1])
+                    and visiting_nodes.isdisjoint(cached[2])
+                ):
+                    rows, reached_refs, reached_nodes = cached
+                    chunk = rows if level == 0 else [(level + offset, label) for offset, label in rows]
+                    if recording:
+                        emitted.extend(chunk)
+                        recording[-1][4] |= reached_refs
+                        recording[-1][5] |= reached_nodes
+                    yield chunk
+                    continue
+            target = all_schemas.get(ref, {})
+            if memo is not None:
+                recording_depth[ref] = len(recording)
+                recording.append([ref, len(recording), len(emitted), len(recording), {ref}, set()])
+            visiting_refs.add(ref)
+            stack.append((_LEAVE_REF, ref, level))
+            stack.append((_ENTER, target, level))
+            continue
+
+        schema_id = id(schema)
+        if schema_id in visiting_nodes:
+            if recording:
+                recording[-1][3] = -1
+            continue
+        visiting_nodes.add(schema_id)
+        if recording:
+            # Inline nodes can be shared between schemas, so a replay must check them too.
+            recording[-1][5].add(schema_id)
+        stack.append((_LEAVE_NODE, schema_id, level))
+
+        schema_type = schema.get("type")
+        if schema_type == "object":
+            props = iter(schema.get("properties", {}).items())
+            required_fields = set(schema.get("required", []))
+            stack.append((_PROPERTIES, (props, required_fields), level))
+        elif schema_type == "array" and "items" in schema:
+            stack.append((_ENTER, schema["items"], level))
+
+
+def iter_schema_tree(schema, all_schemas, level=0, visiting_refs=None, visiting_nodes=None, memo=None):
+    """Yields ``(level, label)`` rows for ``schema`` depth-first, using an explicit stack.
+
+    ``memo`` is an optional dict shared by every call against the same
+    ``all_schemas``. It stores the rows of each expanded ``$ref`` with levels
+    relative to the ref, together with every ref and schema node the
+    expansion entered. Later hits replay those rows unless one of them is
+    currently being visited, in which case the cycle cut-off would differ and
+    the ref is walked again. Expansions cut short by a ref outside their own
+    subtree are never memoized.
+    """
+    for chunk in _iter_row_chunks(schema, all_schemas, level, visiting_refs, visiting_nodes, memo):
+        yield from chunk
+
+
+def parse_schema_tree(schema, all_schemas, level=0, visiting_refs=None, visiting_nodes=None, memo=None):
+    rows = []
+    for chunk in _iter_row_chunks(schema, all_schemas, level, visiting_refs, visiting_nodes, memo):
+        rows.extend(chunk)
     return rows
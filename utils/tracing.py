@@ -0,0 +1,194 @@
+"""Opt-in per-phase timing that exports Chrome trace-event JSON.
+
+Instrumented code wraps each phase in ``span(name, **args)``. While tracing
+is off that returns a shared no-op object, so the instrumentation costs one
+function call. When on, every span becomes a complete (``"ph": "X"``) event
+carrying its ``args``; counters such as bytes or rows are added with
+``span.add(...)``. Timestamps come from ``perf_counter_ns`` shifted onto the
+wall clock once per process, so events recorded in batch worker processes
+line up with the parent's in ``chrome://tracing`` or Perfetto.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+_enabled = False
+_events = []
+_clock_offset_ns = 0
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def add(self, **counters):
+        for key, value in counters.items():
+            self.args[key] = self.args.get(key, 0) + value
+
+    def set(self, **values):
+        self.args.update(values)
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _events.append({
+            "name": self.name,
+            "cat": self.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": (self.start + _clock_offset_ns) / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": self.args,
+        })
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def add(self, **counters):
+        pass
+
+    def set(self, **values):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **args):
+    """Times the enclosed block as phase ``name`` when tracing is enabled."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def enable_tracing():
+    global _enabled, _clock_offset_ns
+    if not _enabled:
+        _clock_offset_ns = time.time_ns() - time.perf_counter_ns()
+        _enabled = True
+
+
+def drain_events():
+    """Removes and returns the events recorded so far in this process."""
+    events = _events[:]
+    del _events[: len(events)]
+    return events
+
+
+def merge_events(events):
+    _events.extend(events)
+
+
+def call_traced(func, *args):
+    """Runs ``func(*args)`` in a worker process with tracing on; returns ``(result, events)``."""
+    enable_tracing()
+    drain_events()
+    result = func(*args)
+    return result, drain_events()
+
+
+def export_trace(path):
+    events = list(_events)
+    metadata = [
+        {"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+         "args": {"name": "main" if pid == os.getpid() else f"worker {pid}"}}
+        for pid in sorted({event["pid"] for event in events})
+    ]
+    payload = {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+
+SUMMARY_COUNTERS = ("bytes", "rows", "refs", "operations")
+
+
+def summarize(events=None):
+    """Aggregates events by phase: ``{name: {"calls", "total_ms", "max_ms", <counters>}}``."""
+    phases = {}
+    for event in _events if events is None else events:
+        entry = phases.setdefault(event["name"], {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+        duration = event["dur"] / 1000
+        entry["calls"] += 1
+        entry["total_ms"] += duration
+        entry["max_ms"] = max(entry["max_ms"], duration)
+        for counter in SUMMARY_COUNTERS:
+            value = event["args"].get(counter)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                entry[counter] = entry.get(counter, 0) + value
+    return phases
+
+
+def summarize_hosts(events=None):
+    """Aggregates ``http.request`` events by host: ``{host: {"requests", "retries", "bytes", "total_ms", "waited_s"}}``."""
+    hosts = {}
+    for event in _events if events is None else events:
+        if event["name"] != "http.request":
+            continue
+        args = event["args"]
+        entry = hosts.setdefault(
+            args.get("host", ""),
+            {"requests": 0, "retries": 0, "bytes": 0, "total_ms": 0.0, "waited_s": 0.0},
+        )
+        entry["requests"] += 1
+        entry["retries"] += max(0, args.get("attempts", 1) - 1)
+        entry["bytes"] += args.get("bytes", 0)
+        entry["total_ms"] += event["dur"] / 1000
+        entry["waited_s"] += args.get("waited_s", 0.0)
+    return hosts
+
+
+def _format_counter(name, value):
+    if name == "bytes":
+        return f"{value / 2**20:.1f} MiB" if value >= 2**20 else f"{value / 1024:.1f} KiB"
+    return f"{value:,} {name}"
+
+
+def print_summary(slowest=5):
+    phases = summarize()
+    if not phases:
+        return
+    print("\n⏱️ Phase timings (wall time summed over calls and threads):")
+    print(f"  {'phase':<28} {'calls':>6} {'total ms':>10} {'max ms':>10}  counters")
+    for name, entry in sorted(phases.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+        counters = ", ".join(_format_counter(key, entry[key]) for key in SUMMARY_COUNTERS if key in entry)
+        print(f"  {name:<28} {entry['calls']:>6} {entry['total_ms']:>10.1f} {entry['max_ms']:>10.1f}  {counters}")
+
+    extractions = [event for event in _events if event["name"] == "extract" and "service" in event["args"]]
+    if len(extractions) > 1:
+        print("  Slowest services:")
+        for event in sorted(extractions, key=lambda item: item["dur"], reverse=True)[:slowest]:
+            print(f"    {event['args']['service']:<26} {event['dur'] / 1000:>10.1f} ms")
+
+    hosts = summarize_hosts()
+    if hosts:
+        print("  Requests per host:")
+        print(f"    {'host':<36} {'requests':>8} {'retries':>8} {'total ms':>10} {'backoff s':>10}  received")
+        for host, entry in sorted(hosts.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+            print(
+                f"    {host:<36} {entry['requests']:>8} {entry['retries']:>8} {entry['total_ms']:>10.1f} "
+                f"{entry['waited_s']:>10.1f}  {_format_counter('bytes', entry['bytes'])}"
+            )
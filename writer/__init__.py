@@ -0,0 +1,57 @@
+import importlib
+import importlib.util
+
+# Writers are imported on demand: openpyxl and pyarrow are slow to import and pyarrow is optional.
+WRITERS = {
+    "xlsx": ("writer.excel_writer", "write_to_excel"),
+    "csv": ("writer.csv_writer", "write_to_csv"),
+    "jsonl": ("writer.jsonl_writer", "write_to_jsonl"),
+    "parquet": ("writer.parquet_writer", "write_to_parquet"),
+}
+OUTPUT_FORMATS = tuple(WRITERS)
+FORMAT_LABELS = {"xlsx": "Excel", "csv": "CSV", "jsonl": "JSONL", "parquet": "Parquet"}
+# Optional packages a format needs, checked without importing them.
+FORMAT_DEPENDENCIES = {"parquet": "pyarrow"}
+DEFAULT_SHARD_ROWS = 250_000
+
+
+def output_extension(output_format):
+    return f".{output_format}"
+
+
+def format_label(output_format):
+    return FORMAT_LABELS.get(output_format, output_format)
+
+
+def missing_dependency(output_format):
+    """Returns the name of the optional package ``output_format`` needs but can't find, else ``None``."""
+    package = FORMAT_DEPENDENCIES.get(output_format)
+    if package and importlib.util.find_spec(package) is None:
+        return package
+    return None
+
+
+def get_writer(output_format):
+    try:
+        module_name, function_name = WRITERS[output_format]
+    except KeyError:
+        raise RuntimeError(
+            f"Unsupported output format '{output_format}'. Choose one of: {', '.join(OUTPUT_FORMATS)}."
+        ) from None
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def write_output(variant_runs, output_file, provider, output_format="xlsx", streaming=False, shard_rows=None, jobs=1):
+    """Writes ``variant_runs`` (a list or any iterable of runs) in ``output_format``.
+
+    With ``shard_rows``, xlsx output is split into shard workbooks written by
+    ``jobs`` processes, plus an index workbook at ``output_file``; the shard
+    paths are returned.
+    """
+    if shard_rows:
+        if output_format != "xlsx":
+            raise RuntimeError(f"Sharded output is only available for xlsx, not {output_format}.")
+        from writer.sharded_writer import write_sharded_excel
+
+        return write_sharded_excel(variant_runs, output_file, provider, shard_rows, jobs=jobs)
+    get_writer(output_format)(variant_runs, output_file, provider, streaming=streaming)
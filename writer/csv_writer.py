@@ -0,0 +1,29 @@
+import csv
+import os
+
+from writer.rows import RECORD_COLUMNS, RecordWriter, write_runs
+
+
+class CsvWriter(RecordWriter):
+    """Streams long-format rows to a UTF-8 CSV file with a header row."""
+
+    def __init__(self, output_file, provider):
+        super().__init__(output_file, provider)
+        self._handle = open(output_file, "w", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._handle)
+        self._csv.writerow(RECORD_COLUMNS)
+
+    def _write_records(self, records):
+        self._csv.writerows(records)
+
+    def close(self):
+        self._handle.close()
+
+    def _abort(self):
+        # Don't leave a truncated file behind that looks like a complete export.
+        self._handle.close()
+        os.unlink(self.output_file)
+
+
+def write_to_csv(variant_runs, output_file, provider, streaming=False):
+    write_runs(CsvWriter, variant_runs, output_file, provider)
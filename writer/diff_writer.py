@@ -0,0 +1,24 @@
+from openpyxl import Workbook
+
+from utils.api_diff import iter_change_rows
+
+CHANGE_HEADERS = ("Change", "Variant", "Resource", "Method", "Parameter", "Old", "New")
+
+
+def write_diff_workbook(report, output_file, old_label, new_label):
+    """Writes a ``Summary`` sheet and one ``Changes`` row per added, removed or changed item."""
+    wb = Workbook(write_only=True)
+
+    summary = wb.create_sheet(title="Summary")
+    summary.append(("Old", old_label))
+    summary.append(("New", new_label))
+    for name, count in report["summary"].items():
+        summary.append((name.replace("_", " ").capitalize(), count))
+
+    changes = wb.create_sheet(title="Changes")
+    changes.freeze_panes = "A2"
+    changes.append(CHANGE_HEADERS)
+    for row in iter_change_rows(report):
+        changes.append(row)
+
+    wb.save(output_file)
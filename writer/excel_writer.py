@@ -1,7 +1,10 @@
+import os
 from collections import OrderedDict
 
 from openpyxl import Workbook
 
+from utils.tracing import span
+
 INVALID_SHEET_CHARS = set(r'[]:*?/\\')
 MAX_SHEET_LENGTH = 31
 
@@ -22,7 +25,7 @@ def _make_sheet_title(label, existing_titles):
     return candidate
 
 
-def _populate_sheet(ws, provider, service_label, api_data):
+def _sheet_headers(provider, service_label, num_levels):
     target_label = (
         f"{service_label} API Action"
         if provider == "aws"
@@ -30,74 +33,143 @@ def _populate_sheet(ws, provider, service_label, api_data):
         if provider == "gcp"
         else f"{service_label} Resource Operation"
     )
-    method_label = "API Method"
+    level_headers = [f"Level {idx}" for idx in range(1, num_levels + 1)]
+    if provider == "aws":
+        return [target_label, *level_headers]
+    return [target_label, "API Method", *level_headers]
 
+
+def _count_levels(api_data):
     max_level = 4
     for item in api_data:
         for level, _ in item.get("tree") or []:
             if isinstance(level, int):
                 max_level = max(max_level, level)
+    return max(5, max_level + 1)
 
-    num_levels = max(5, max_level + 1)
-    level_headers = [f"Level {idx}" for idx in range(1, num_levels + 1)]
 
-    if provider == "aws":
-        headers = [target_label, *level_headers]
-        ws.append(headers)
-        ws.freeze_panes = "A2"
+def _param_row(prefix_width, num_levels, level, param):
+    depth = level if isinstance(level, int) else 0
+    depth = max(0, depth)
+    if depth >= num_levels:
+        depth = num_levels - 1
+    return (None,) * (prefix_width + depth) + (param,)
 
+
+def _group_by_resource(api_data, service_label):
+    grouped = OrderedDict()
+    for item in api_data:
+        resource_key = item.get("resource") or service_label
+        if resource_key not in grouped:
+            grouped[resource_key] = []
+        grouped[resource_key].append(item)
+    return grouped
+
+
+def _iter_sheet_rows(provider, service_label, api_data, num_levels):
+    """Yields sheet rows with ``None`` for empty cells and trailing blanks dropped."""
+    if provider == "aws":
         for item in api_data:
-            action_name = item.get("method", "")
-            tree_rows = item.get("tree") or []
-
-            action_row = [action_name] + [""] * num_levels
-            ws.append(action_row)
-
-            for level, param in tree_rows:
-                depth = level if isinstance(level, int) else 0
-                depth = max(0, depth)
-                if depth >= num_levels:
-                    depth = num_levels - 1
-                level_cells = [""] * num_levels
-                level_cells[depth] = param
-                indent_row = [""] + level_cells
-                ws.append(indent_row)
-    else:
-        headers = [target_label, method_label, *level_headers]
-        ws.append(headers)
+            yield (item.get("method", ""),)
+            for level, param in item.get("tree") or []:
+                yield _param_row(1, num_levels, level, param)
+        return
+
+    for resource, methods in _group_by_resource(api_data, service_label).items():
+        resource_written = False
+        for method_entry in methods:
+            resource_cell = resource if not resource_written else None
+            resource_written = True
+            yield (resource_cell, method_entry.get("method", ""))
+            for level, param in method_entry.get("tree") or []:
+                yield _param_row(2, num_levels, level, param)
+
+
+def _populate_sheet(ws, provider, service_label, api_data):
+    num_levels = _count_levels(api_data)
+    ws.append(_sheet_headers(provider, service_label, num_levels))
+    ws.freeze_panes = "A2"
+
+    for row in _iter_sheet_rows(provider, service_label, api_data, num_levels):
+        ws.append({col_idx: value for col_idx, value in enumerate(row, 1) if value is not None})
+
+
+class StreamingExcelWriter:
+    """Writes worksheets through openpyxl's write-only mode.
+
+    Each sheet is streamed to a temporary file row by row as it is added, so
+    memory stays flat regardless of how many rows the workbook ends up with.
+    """
+
+    def __init__(self, output_file, provider):
+        self.output_file = output_file
+        self.provider = provider
+        self._wb = Workbook(write_only=True)
+        self._existing_titles = set()
+
+    def write_sheet(self, run, title=None, num_levels=None):
+        """Streams ``run`` into a new sheet; ``title`` and ``num_levels`` override the derived ones."""
+        service_label = run["label"] or run["key"]
+        api_data = run["data"]
+        if num_levels is None:
+            num_levels = _count_levels(api_data)
+        if title is None:
+            title = _make_sheet_title(service_label, self._existing_titles)
+
+        ws = self._wb.create_sheet(title=title)
         ws.freeze_panes = "A2"
+        ws.append(_sheet_headers(self.provider, service_label, num_levels))
+        for row in _iter_sheet_rows(self.provider, service_label, api_data, num_levels):
+            ws.append(row)
+
+    def close(self):
+        with span("xlsx.save", streaming=True):
+            try:
+                self._wb.save(self.output_file)
+            except BaseException:
+                self._remove_output()
+                raise
+
+    def abort(self):
+        """Discards the workbook: closes the sheets' temporary files, removes them and writes nothing."""
+        for ws in self._wb.worksheets:
+            # openpyxl keeps each write-only sheet in a temporary file until the workbook is saved.
+            writer = ws._writer
+            if writer is None:
+                continue
+            try:
+                if ws._rows is not None:
+                    ws._rows.close()
+                writer.close()
+                writer.cleanup()
+            except (OSError, ValueError):
+                pass
+
+    def _remove_output(self):
+        # Don't leave a truncated workbook behind that looks like a complete export.
+        try:
+            os.unlink(self.output_file)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_to_excel(variant_runs, output_file, provider, streaming=False):
+    if streaming:
+        with StreamingExcelWriter(output_file, provider) as writer:
+            for run in variant_runs:
+                writer.write_sheet(run)
+        return
 
-        grouped = OrderedDict()
-        for item in api_data:
-            resource_key = item.get("resource") or service_label
-            if resource_key not in grouped:
-                grouped[resource_key] = []
-            grouped[resource_key].append(item)
-
-        for resource, methods in grouped.items():
-            resource_written = False
-            for method_entry in methods:
-                method_name = method_entry.get("method", "")
-                tree_rows = method_entry.get("tree") or []
-
-                resource_cell = resource if not resource_written else ""
-                resource_written = True
-
-                method_row = [resource_cell, method_name] + [""] * num_levels
-                ws.append(method_row)
-
-                for level, param in tree_rows:
-                    depth = level if isinstance(level, int) else 0
-                    depth = max(0, depth)
-                    if depth >= num_levels:
-                        depth = num_levels - 1
-                    level_cells = [""] * num_levels
-                    level_cells[depth] = param
-                    param_row = ["", ""] + level_cells
-                    ws.append(param_row)
-
-
-def write_to_excel(variant_runs, output_file, provider):
     wb = Workbook()
     existing_titles = set()
 
@@ -111,4 +183,5 @@ def write_to_excel(variant_runs, output_file, provider):
             ws = wb.create_sheet(title=sheet_title)
         _populate_sheet(ws, provider, service_label, run["data"])
 
-    wb.save(output_file)
+    with span("xlsx.save", streaming=False):
+        wb.save(output_file)
@@ -0,0 +1,37 @@
+import json
+import os
+
+from writer.rows import RECORD_COLUMNS, RecordWriter, write_runs
+
+WRITE_BATCH = 4096
+
+
+class JsonlWriter(RecordWriter):
+    """Streams long-format rows as one JSON object per line."""
+
+    def __init__(self, output_file, provider):
+        super().__init__(output_file, provider)
+        self._handle = open(output_file, "w", encoding="utf-8")
+        self._encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+    def _write_records(self, records):
+        lines = []
+        for record in records:
+            lines.append(self._encode(dict(zip(RECORD_COLUMNS, record))))
+            if len(lines) >= WRITE_BATCH:
+                self._handle.write("\n".join(lines) + "\n")
+                lines = []
+        if lines:
+            self._handle.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self._handle.close()
+
+    def _abort(self):
+        # Don't leave a truncated file behind that looks like a complete export.
+        self._handle.close()
+        os.unlink(self.output_file)
+
+
+def write_to_jsonl(variant_runs, output_file, provider, streaming=False):
+    write_runs(JsonlWriter, variant_runs, output_file, provider)
@@ -0,0 +1,61 @@
+import os
+
+from writer.rows import RECORD_COLUMNS, RecordWriter, write_runs
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+ROW_GROUP_SIZE = 65536
+
+
+def _schema():
+    return pa.schema([
+        (name, pa.int16() if name == "level" else pa.string())
+        for name in RECORD_COLUMNS
+    ])
+
+
+class ParquetWriter(RecordWriter):
+    """Streams long-format rows into a Parquet file, one row group per batch.
+
+    Requires ``pyarrow`` (``pip install pyarrow``).
+    """
+
+    def __init__(self, output_file, provider):
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow. Install it with 'pip install pyarrow'.")
+        super().__init__(output_file, provider)
+        self._schema = _schema()
+        self._writer = pq.ParquetWriter(output_file, self._schema, compression="zstd")
+
+    def _write_records(self, records):
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= ROW_GROUP_SIZE:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch):
+        columns = list(zip(*batch))
+        self._writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+    def _abort(self):
+        self._writer.close()
+        os.unlink(self.output_file)
+
+
+def write_to_parquet(variant_runs, output_file, provider, streaming=False):
+    write_runs(ParquetWriter, variant_runs, output_file, provider)
@@ -0,0 +1,69 @@
+"""Long-format rows shared by the tabular writers (CSV, JSONL, Parquet).
+
+Every parameter becomes one row carrying its service variant, resource,
+method and API path, so the output can be filtered, grepped or loaded into
+a warehouse without reconstructing the sheet layout. Methods appear once
+with an empty level/parameter, matching the method row of the worksheet,
+and ``level`` is 1-based like the ``Level N`` columns.
+"""
+
+from abc import ABC, abstractmethod
+
+RECORD_COLUMNS = ("provider", "variant", "resource", "method", "api_path", "level", "parameter")
+
+
+def iter_records(provider, run):
+    variant = run["label"] or run["key"]
+    for item in run["data"]:
+        resource = item.get("resource") or variant
+        method = item.get("method", "")
+        api_path = item.get("apiPath") or ""
+        yield (provider, variant, resource, method, api_path, None, None)
+        for level, param in item.get("tree") or []:
+            depth = level + 1 if isinstance(level, int) else None
+            yield (provider, variant, resource, method, api_path, depth, param)
+
+
+class RecordWriter(ABC):
+    """Base for writers that stream ``iter_records`` rows run by run.
+
+    Subclasses implement ``_write_records(records)`` and ``close()``, and may
+    override ``_abort()`` to clean up after a failed write.
+    """
+
+    def __init__(self, output_file, provider):
+        self.output_file = output_file
+        self.provider = provider
+
+    def write_sheet(self, run):
+        self._write_records(iter_records(self.provider, run))
+
+    @abstractmethod
+    def _write_records(self, records):
+        """Writes an iterable of ``RECORD_COLUMNS`` tuples."""
+
+    @abstractmethod
+    def close(self):
+        """Finishes the output file."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+        return False
+
+    def _abort(self):
+        pass
+
+
+def write_runs(writer_class, variant_runs, output_file, provider):
+    count = 0
+    with writer_class(output_file, provider) as writer:
+        for run in variant_runs:
+            writer.write_sheet(run)
+            count += 1
+    return count
@@ -0,0 +1,189 @@
+"""Sharded xlsx output for exports too large for one sheet, one workbook or one core.
+
+Each variant run is cut into sheets of at most ``shard_rows`` rows, never
+past Excel's 1,048,576-row limit. Cuts fall between operations, except for a
+single operation that is bigger than a sheet on its own. Sheets are packed
+into shard workbooks of about ``shard_rows`` rows. Worker processes write the
+shards in openpyxl write-only mode, and ``output_file`` becomes a small index
+workbook that links every sheet of every shard.
+"""
+
+import os
+import re
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.worksheet.hyperlink import Hyperlink
+
+from utils.tracing import span, tracing_enabled
+from writer import DEFAULT_SHARD_ROWS
+from writer.excel_writer import (
+    MAX_SHEET_LENGTH,
+    StreamingExcelWriter,
+    _count_levels,
+    _group_by_resource,
+    _make_sheet_title,
+)
+
+EXCEL_MAX_ROWS = 1_048_576
+INDEX_HEADERS = ("Service", "Part", "Sheet", "Workbook", "Operations", "Rows")
+
+
+def _plain_item(item, tree):
+    return {
+        "apiPath": item.get("apiPath") or "",
+        "resource": item.get("resource") or "",
+        "method": item.get("method", ""),
+        "tree": tree,
+    }
+
+
+def _split_run(provider, run, max_rows):
+    """Yields ``(items, rows)`` chunks of ``run`` holding at most ``max_rows`` sheet rows each."""
+    label = run["label"] or run["key"]
+    items = run["data"]
+    if provider != "aws":
+        # Keep the worksheet's resource grouping intact across the cut.
+        items = [item for methods in _group_by_resource(items, label).values() for item in methods]
+
+    chunk, used = [], 0
+    for item in items:
+        tree = list(item.get("tree") or [])
+        size = 1 + len(tree)
+        if chunk and used + size > max_rows:
+            yield chunk, used
+            chunk, used = [], 0
+        while size > max_rows:
+            # One operation larger than a sheet: continue its tree on the next sheet.
+            yield [_plain_item(item, tree[: max_rows - 1])], max_rows
+            tree = tree[max_rows - 1:]
+            size = 1 + len(tree)
+        chunk.append(_plain_item(item, tree))
+        used += size
+    if chunk:
+        yield chunk, used
+
+
+def _part_title(label, part, parts, existing_titles):
+    if parts == 1:
+        return _make_sheet_title(label, existing_titles)
+    suffix = f" ({part} of {parts})"
+    base = (label or "Sheet")[: MAX_SHEET_LENGTH - len(suffix)].rstrip()
+    return _make_sheet_title(f"{base}{suffix}", existing_titles)
+
+
+def plan_shards(provider, variant_runs, shard_rows=DEFAULT_SHARD_ROWS):
+    """Splits ``variant_runs`` into shards: lists of sheet dicts with title, label, part and items."""
+    max_sheet_rows = min(shard_rows, EXCEL_MAX_ROWS - 1)
+    existing_titles = set()
+    shards = []
+    used = 0
+    for run in variant_runs:
+        label = run["label"] or run["key"]
+        num_levels = _count_levels(run["data"])
+        parts = list(_split_run(provider, run, max_sheet_rows))
+        for number, (items, rows) in enumerate(parts, 1):
+            if not shards or (shards[-1] and used + rows > shard_rows):
+                shards.append([])
+                used = 0
+            shards[-1].append({
+                "title": _part_title(label, number, len(parts), existing_titles),
+                "label": label,
+                "part": number,
+                "parts": len(parts),
+                "num_levels": num_levels,
+                "operations": len(items),
+                "rows": rows,
+                "items": items,
+            })
+            used += rows
+    return shards
+
+
+def _write_shard(path, provider, sheets):
+    with span("xlsx.shard", shard=Path(path).name) as phase:
+        with StreamingExcelWriter(path, provider) as writer:
+            for sheet in sheets:
+                run = {"key": sheet["label"], "label": sheet["label"], "data": sheet["items"]}
+                writer.write_sheet(run, title=sheet["title"], num_levels=sheet["num_levels"])
+                phase.add(rows=sheet["rows"])
+    return path
+
+
+def _write_shards(job_args, jobs):
+    if jobs <= 1 or len(job_args) <= 1:
+        return [_write_shard(*args) for args in job_args]
+    from concurrent.futures import ProcessPoolExecutor
+
+    traced = tracing_enabled()
+    if traced:
+        from utils.tracing import call_traced, merge_events
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(job_args))) as executor:
+        if not traced:
+            return list(executor.map(_write_shard, *zip(*job_args)))
+        futures = [executor.submit(call_traced, _write_shard, *args) for args in job_args]
+        paths = []
+        for future in futures:
+            path, events = future.result()
+            merge_events(events)
+            paths.append(path)
+        return paths
+
+
+def _sheet_location(title):
+    escaped = title.replace("'", "''")
+    return f"'{escaped}'!A1"
+
+
+def _link(cell, target, location=None):
+    cell.hyperlink = Hyperlink(ref=cell.coordinate, target=target, location=location)
+    cell.style = "Hyperlink"
+
+
+def _write_index(output_file, shards, shard_paths):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Index"
+    ws.append(INDEX_HEADERS)
+    ws.freeze_panes = "A2"
+    index_dir = Path(output_file).resolve().parent
+    for path, sheets in zip(shard_paths, shards):
+        target = Path(os.path.relpath(path, index_dir)).as_posix()
+        for sheet in sheets:
+            part = f"{sheet['part']} of {sheet['parts']}"
+            ws.append((sheet["label"], part, sheet["title"], target, sheet["operations"], sheet["rows"]))
+            _link(ws.cell(row=ws.max_row, column=3), target, _sheet_location(sheet["title"]))
+            _link(ws.cell(row=ws.max_row, column=4), target)
+    with span("xlsx.save", streaming=False, index=True):
+        wb.save(output_file)
+
+
+def shard_directory(output_file):
+    output_file = Path(output_file)
+    return output_file.with_name(f"{output_file.stem}-shards")
+
+
+def write_sharded_excel(variant_runs, output_file, provider, shard_rows=DEFAULT_SHARD_ROWS, jobs=1):
+    """Writes shard workbooks under ``<stem>-shards/`` and an index at ``output_file``.
+
+    Returns the shard paths. Shards left over from an earlier, larger run are removed.
+    """
+    if shard_rows < 2:
+        raise RuntimeError("Sharded output needs at least 2 rows per shard.")
+    shards = plan_shards(provider, variant_runs, shard_rows)
+
+    stem = Path(output_file).stem
+    directory = shard_directory(output_file)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = [str(directory / f"{stem}-{number:03d}.xlsx") for number in range(1, len(shards) + 1)]
+    shard_paths = _write_shards([(path, provider, sheets) for path, sheets in zip(paths, shards)], jobs)
+
+    pattern = re.compile(rf"{re.escape(stem)}-\d{{3,}}\.xlsx")
+    keep = {Path(path).name for path in shard_paths}
+    for stale in directory.glob(f"{stem}-*.xlsx"):
+        if pattern.fullmatch(stale.name) and stale.name not in keep:
+            stale.unlink()
+
+    _write_index(output_file, shards, shard_paths)
+    return shard_paths